@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, deduplicated store for inter-agent artefacts.
+
+Developers, critics, auditors and experts hand work to each other through
+``.artefacts/`` and ``.scratch/``. Handing over plain files means near-identical
+diffs, logs and reports are written and read in full every review round. This
+store keeps each distinct blob once, compressed (zstd when the ``zstandard``
+package is installed, zlib otherwise). A manifest maps
+``task id -> review round -> signal -> name`` to blobs.
+
+``delta`` summarises what changed for a task since an earlier round, so an
+agent can read only that rather than every file again. ``gc`` drops artefacts
+for tasks the event log shows as complete and then evicts least-recently-used
+blobs until the store fits its size cap, never touching the latest two rounds
+of a task that is still open.
+
+Reads (``get``, ``list``, ``delta``) take a shared lock and do not rewrite the
+manifest; a blob's last use is its object file's mtime.
+
+Layout, under ``.claude/bonfire/[plan]/.artefacts/store/``:
+
+    manifest.json
+    objects/ab/cdef...      # sha256 of the uncompressed content; mtime = last access
+
+Usage:
+    python .claude/scripts/artefact-store.py put .claude/bonfire/my_plan --task task-1-1 --signal READY_FOR_REVIEW diff.patch
+    python .claude/scripts/artefact-store.py get .claude/bonfire/my_plan --task task-1-1 diff.patch
+    python .claude/scripts/artefact-store.py delta .claude/bonfire/my_plan --task task-1-1
+    python .claude/scripts/artefact-store.py gc .claude/bonfire/my_plan --max-bytes 200000000
+    python .claude/scripts/artefact-store.py bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import fcntl
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from bonfire_events import EVENT_LOG_NAME, FAILURE_SIGNALS, iter_events, write_json_atomic
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STORE_DIR = Path(".artefacts") / "store"
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+MANIFEST_VERSION = 1
+# One-byte codec tag at the start of every stored blob.
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+DELTA_CONTEXT_LINES = 2
+DELTA_MAX_LINES = 400
+
+
+# =============================================================================
+# Blobs
+# =============================================================================
+
+
+def compress(data: bytes) -> bytes:
+    if zstandard is not None:
+        return CODEC_ZSTD + zstandard.ZstdCompressor(level=10).compress(data)
+    return CODEC_ZLIB + zlib.compress(data, 6)
+
+
+def decompress(blob: bytes) -> bytes:
+    codec, payload = blob[:1], blob[1:]
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("blob is zstd-compressed; install with: uv pip install --system zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise RuntimeError(f"unknown blob codec {codec!r}")
+
+
+class ArtefactStore:
+    """A plan's artefact store. Calls must run inside ``locked()``; mutating ones with ``write=True``."""
+
+    def __init__(self, plan_dir: Path):
+        self.plan_dir = plan_dir
+        self.root = plan_dir / STORE_DIR
+        self.objects = self.root / "objects"
+        self.manifest_path = self.root / MANIFEST_NAME
+        self.manifest: dict[str, Any] = {"version": MANIFEST_VERSION, "tasks": {}, "blobs": {}}
+        self.bytes_read = 0
+
+    @contextmanager
+    def locked(self, write: bool = False) -> Iterator[ArtefactStore]:
+        """
+        Hold the store lock and load the manifest.
+
+        Readers share the lock. With ``write``, the lock is exclusive and the
+        manifest is saved on success if it changed.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / LOCK_NAME, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+            try:
+                self._load()
+                loaded = json.dumps(self.manifest, sort_keys=True) if write else None
+                yield self
+                if write and json.dumps(self.manifest, sort_keys=True) != loaded:
+                    write_json_atomic(self.manifest_path, self.manifest)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        if not self.manifest_path.exists():
+            return
+        with open(self.manifest_path, encoding="utf-8") as handle:
+            manifest = json.load(handle)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise RuntimeError(f"unsupported manifest version in {self.manifest_path}")
+        self.manifest = manifest
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def write_blob(self, data: bytes) -> str:
+        """Store ``data`` if it is new and return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        blobs = self.manifest["blobs"]
+        path = self._object_path(digest)
+        if digest not in blobs or not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(compress(data))
+            os.replace(tmp, path)
+            blobs[digest] = {"size": len(data), "stored": path.stat().st_size}
+        else:
+            self._touch(path)
+        return digest
+
+    def read_blob(self, digest: str) -> bytes:
+        path = self._object_path(digest)
+        blob = path.read_bytes()
+        self.bytes_read += len(blob)
+        self._touch(path)
+        return decompress(blob)
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # Access times live on the object files so that reads never rewrite the manifest.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def last_access(self, digest: str) -> float:
+        try:
+            return self._object_path(digest).stat().st_mtime
+        except OSError:
+            return 0.0
+
+    # -------------------------------------------------------------------------
+    # Manifest
+    # -------------------------------------------------------------------------
+
+    def rounds(self, task_id: str) -> dict[str, dict[str, dict[str, str]]]:
+        """``{round: {signal: {name: digest}}}`` for a task."""
+        return self.manifest["tasks"].get(task_id, {})
+
+    def latest_round(self, task_id: str) -> int:
+        return max((int(r) for r in self.rounds(task_id)), default=0)
+
+    def put(self, task_id: str, signal: str, files: dict[str, bytes], round_number: int | None = None) -> int:
+        """
+        Record ``files`` for a task under ``signal`` and return the round used.
+
+        Without an explicit round, artefacts join the latest round, merging
+        with any already stored for the same signal. Once a failure signal
+        (REVIEW_FAILED, AUDIT_FAILED) is recorded for that round, any other
+        signal starts the next round (e.g. READY_FOR_REVIEW after REVIEW_FAILED).
+        """
+        rounds = self.manifest["tasks"].setdefault(task_id, {})
+        if round_number is None:
+            latest = self.latest_round(task_id)
+            failed = FAILURE_SIGNALS & rounds[str(latest)].keys() if latest else set()
+            round_number = latest + 1 if not latest or (failed and signal not in failed) else latest
+        entry = rounds.setdefault(str(round_number), {}).setdefault(signal, {})
+        for name, data in files.items():
+            entry[name] = self.write_blob(data)
+        return round_number
+
+    def find(self, task_id: str, name: str, round_number: int | None, signal: str | None) -> str | None:
+        """Digest of the newest matching artefact, searching back from ``round_number``."""
+        rounds = self.rounds(task_id)
+        for number in sorted((int(r) for r in rounds), reverse=True):
+            if round_number is not None and number > round_number:
+                continue
+            for entry_signal, names in rounds[str(number)].items():
+                if (signal is None or entry_signal == signal) and name in names:
+                    return names[name]
+        return None
+
+    def snapshot(self, task_id: str, round_number: int) -> dict[str, str]:
+        """Every artefact name visible at a round (later rounds shadow earlier ones)."""
+        view: dict[str, str] = {}
+        rounds = self.rounds(task_id)
+        for number in sorted(int(r) for r in rounds):
+            if number > round_number:
+                break
+            for signal, names in rounds[str(number)].items():
+                for name, digest in names.items():
+                    view[f"{signal}/{name}"] = digest
+        return view
+
+    # -------------------------------------------------------------------------
+    # Delta summaries
+    # -------------------------------------------------------------------------
+
+    def delta(self, task_id: str, since_round: int | None = None) -> dict[str, Any]:
+        """What changed between ``since_round`` (default: the previous round) and the latest round."""
+        latest = self.latest_round(task_id)
+        since = latest - 1 if since_round is None else since_round
+        before = self.snapshot(task_id, since) if since > 0 else {}
+        after = self.snapshot(task_id, latest)
+
+        changes = []
+        for key in sorted(set(before) | set(after)):
+            old, new = before.get(key), after.get(key)
+            if old == new:
+                continue
+            change: dict[str, Any] = {"artefact": key, "blob": new}
+            if old is None:
+                change["status"] = "added"
+                change["size"] = self.manifest["blobs"][new]["size"]
+            elif new is None:
+                change["status"] = "removed"
+            else:
+                change["status"] = "modified"
+                change["diff"] = self._text_diff(key, old, new)
+            changes.append(change)
+        return {
+            "task_id": task_id,
+            "from_round": since,
+            "to_round": latest,
+            "unchanged": sum(1 for k in after if before.get(k) == after[k]),
+            "changes": changes,
+        }
+
+    def _text_diff(self, key: str, old: str, new: str) -> str | None:
+        try:
+            old_lines = self.read_blob(old).decode("utf-8").splitlines(keepends=True)
+            new_lines = self.read_blob(new).decode("utf-8").splitlines(keepends=True)
+        except UnicodeDecodeError:
+            return None
+        diff = list(difflib.unified_diff(old_lines, new_lines, f"a/{key}", f"b/{key}", n=DELTA_CONTEXT_LINES))
+        if len(diff) > DELTA_MAX_LINES:
+            diff = diff[:DELTA_MAX_LINES] + [f"... {len(diff) - DELTA_MAX_LINES} more diff lines\n"]
+        return "".join(diff)
+
+    # -------------------------------------------------------------------------
+    # Retention
+    # -------------------------------------------------------------------------
+
+    def gc(self, max_bytes: int, completed: set[str], drop_completed: bool = True) -> dict[str, Any]:
+        """
+        Drop completed tasks, then evict least-recently-used blobs until under ``max_bytes``.
+
+        Blobs in the latest two rounds of a task that is not in ``completed``
+        are never evicted: the latest is still being reviewed or audited, and
+        the one before is what ``delta`` compares it with and holds the review
+        the developer is answering.
+        """
+        tasks = self.manifest["tasks"]
+        blobs = self.manifest["blobs"]
+        dropped_tasks = sorted(t for t in tasks if t in completed) if drop_completed else []
+        for task_id in dropped_tasks:
+            del tasks[task_id]
+
+        referenced = {
+            digest
+            for rounds in tasks.values() for signals in rounds.values()
+            for names in signals.values() for digest in names.values()
+        }
+        protected = {
+            digest
+            for task_id, rounds in tasks.items() if task_id not in completed
+            for number in sorted(int(r) for r in rounds)[-2:]
+            for names in rounds[str(number)].values() for digest in names.values()
+        }
+        evict = {digest for digest in blobs if digest not in referenced}
+        stored = sum(info["stored"] for digest, info in blobs.items() if digest not in evict)
+        for digest in sorted((referenced - protected) & blobs.keys(), key=self.last_access):
+            if stored <= max_bytes:
+                break
+            evict.add(digest)
+            stored -= blobs[digest]["stored"]
+
+        if evict:
+            for rounds in tasks.values():
+                for signals in rounds.values():
+                    for names in signals.values():
+                        for name in [n for n, d in names.items() if d in evict]:
+                            del names[name]
+        freed = 0
+        for digest in evict:
+            freed += blobs.pop(digest)["stored"]
+            path = self._object_path(digest)
+            path.unlink(missing_ok=True)
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
+        return {"dropped_tasks": dropped_tasks, "evicted_blobs": len(evict), "freed_bytes": freed,
+                "stored_bytes": stored, "protected_blobs": len(protected)}
+
+    def stats(self) -> dict[str, Any]:
+        blobs = self.manifest["blobs"].values()
+        logical = sum(
+            self.manifest["blobs"][digest]["size"]
+            for rounds in self.manifest["tasks"].values() for signals in rounds.values()
+            for names in signals.values() for digest in names.values()
+        )
+        return {
+            "tasks": len(self.manifest["tasks"]),
+            "blobs": len(self.manifest["blobs"]),
+            "logical_bytes": logical,
+            "unique_bytes": sum(b["size"] for b in blobs),
+            "stored_bytes": sum(b["stored"] for b in blobs),
+            "codec": "zstd" if zstandard is not None else "zlib",
+        }
+
+
+def completed_tasks(plan_dir: Path) -> set[str]:
+    return {
+        event.task_id
+        for event in iter_events(plan_dir / EVENT_LOG_NAME)
+        if event.kind == "AUDIT_PASSED" and event.task_id
+    }
+
+
+def collect_files(paths: list[Path], name: str | None) -> dict[str, bytes]:
+    """Map artefact names to contents; directories are added recursively."""
+    files: dict[str, bytes] = {}
+    for path in paths:
+        if str(path) == "-":
+            files[name or "stdin"] = sys.stdin.buffer.read()
+        elif path.is_dir():
+            for child in sorted(p for p in path.rglob("*") if p.is_file()):
+                files[child.relative_to(path).as_posix()] = child.read_bytes()
+        else:
+            files[name if name and len(paths) == 1 else path.name] = path.read_bytes()
+    return files
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+
+def bench(tasks: int, rounds: int) -> None:
+    """Replay a synthetic run, comparing plain-file handoffs with the store."""
+    rng = random.Random(42)
+    base_source = [f"line {i}: {'x' * rng.randint(20, 70)}\n" for i in range(3000)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plan_dir = Path(tmp)
+        plain_written = plain_read = 0
+        store = ArtefactStore(plan_dir)
+        store_read = 0
+        store_handed = 0
+
+        for task in range(tasks):
+            task_id = f"task-{task // 10 + 1}-{task % 10 + 1}"
+            source = list(base_source)
+            for round_number in range(1, rounds + 1):
+                for _ in range(15):
+                    source[rng.randrange(len(source))] = f"edit {task}.{round_number}: {rng.random()}\n"
+                diff = "".join(source[:1500]).encode()
+                log = ("".join(source[1500:]) + f"tests: {round_number} failures\n").encode()
+                review = f"Round {round_number} review of {task_id}: fix naming\n".encode() * 40
+                handoff = {"diff.patch": diff, "test.log": log}
+
+                # Plain files: every handoff is written in full and each reviewer reads all of it.
+                plain_written += sum(len(v) for v in handoff.values()) + len(review)
+                plain_read += 2 * sum(len(v) for v in handoff.values()) + len(review)
+
+                with store.locked(write=True):
+                    store.bytes_read = 0
+                    store.put(task_id, "READY_FOR_REVIEW", handoff)
+                    store.put(task_id, "REVIEW_FAILED", {"review.md": review})
+                    # Critic and auditor each read the full handoff on round 1, then only the delta.
+                    if round_number == 1:
+                        handed = sum(len(store.read_blob(store.find(task_id, n, None, None))) for n in handoff)
+                    else:
+                        handed = len(json.dumps(store.delta(task_id)))
+                    store_read += 2 * store.bytes_read
+                    # The developer reads the review, as with plain files.
+                    store.bytes_read = 0
+                    store.read_blob(store.find(task_id, "review.md", None, None))
+                    store_read += store.bytes_read
+                    store_handed += 2 * handed + len(review)
+
+        with store.locked():
+            stats = store.stats()
+        on_disk = sum(p.stat().st_size for p in (plan_dir / STORE_DIR).rglob("*") if p.is_file())
+        print(f"Synthetic run: {tasks} tasks x {rounds} review rounds ({stats['codec']})")
+        print(f"{'':<22} {'plain files':>14} {'store':>14}")
+        print(f"{'disk footprint':<22} {plain_written:>14,} {on_disk:>14,}")
+        print(f"{'bytes to agents/task':<22} {plain_read // tasks:>14,} {store_handed // tasks:>14,}")
+        print(f"{'disk reads/task':<22} {plain_read // tasks:>14,} {store_read // tasks:>14,}")
+        print(f"unique blobs: {stats['blobs']}, logical bytes: {stats['logical_bytes']:,}")
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Content-addressed artefact store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def plan(p: argparse.ArgumentParser) -> None:
+        p.add_argument("plan_dir", type=Path, help="Plan state directory (.claude/bonfire/[plan])")
+
+    put = sub.add_parser("put", help="Store files (or directories, or - for stdin) for a task")
+    plan(put)
+    put.add_argument("--task", required=True)
+    put.add_argument("--signal", required=True, help="Signal the artefacts accompany, e.g. READY_FOR_REVIEW")
+    put.add_argument("--round", type=int, help="Review round (default: inferred)")
+    put.add_argument("--name", help="Artefact name for a single file or stdin")
+    put.add_argument("paths", nargs="+", type=Path)
+
+    get = sub.add_parser("get", help="Print or write an artefact")
+    plan(get)
+    get.add_argument("--task", required=True)
+    get.add_argument("--round", type=int, help="Newest at or before this round (default: latest)")
+    get.add_argument("--signal")
+    get.add_argument("-o", "--output", type=Path)
+    get.add_argument("name")
+
+    lst = sub.add_parser("list", help="Show the manifest")
+    plan(lst)
+    lst.add_argument("--task")
+
+    delta = sub.add_parser("delta", help="Summarise changes since an earlier round")
+    plan(delta)
+    delta.add_argument("--task", required=True)
+    delta.add_argument("--since-round", type=int, help="Compare against this round (default: previous)")
+
+    gc = sub.add_parser("gc", help="Drop completed tasks and enforce the size cap")
+    plan(gc)
+    gc.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    gc.add_argument("--keep-completed", action="store_true", help="Do not drop tasks that passed audit")
+
+    ben = sub.add_parser("bench", help="Disk and read footprint on a synthetic replayed run")
+    ben.add_argument("--tasks", type=int, default=50)
+    ben.add_argument("--rounds", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.tasks, args.rounds)
+        return 0
+
+    if not args.plan_dir.is_dir():
+        print(f"Error: plan directory not found: {args.plan_dir}", file=sys.stderr)
+        return 1
+    store = ArtefactStore(args.plan_dir)
+
+    try:
+        if args.command == "put":
+            files = collect_files(args.paths, args.name)
+            with store.locked(write=True):
+                round_number = store.put(args.task, args.signal, files, args.round)
+            print(json.dumps({"task_id": args.task, "round": round_number, "stored": sorted(files)}))
+        elif args.command == "get":
+            with store.locked():
+                digest = store.find(args.task, args.name, args.round, args.signal)
+                if digest is None:
+                    print(f"Error: no artefact {args.name!r} for {args.task}", file=sys.stderr)
+                    return 1
+                data = store.read_blob(digest)
+            if args.output:
+                args.output.write_bytes(data)
+            else:
+                sys.stdout.buffer.write(data)
+        elif args.command == "list":
+            with store.locked():
+                tasks = store.manifest["tasks"]
+                shown = {args.task: tasks.get(args.task, {})} if args.task else tasks
+                print(json.dumps({"stats": store.stats(), "tasks": shown}, indent=2))
+        elif args.command == "delta":
+            with store.locked():
+                print(json.dumps(store.delta(args.task, args.since_round), indent=2))
+        elif args.command == "gc":
+            completed = completed_tasks(args.plan_dir)
+            with store.locked(write=True):
+                print(json.dumps(store.gc(args.max_bytes, completed, not args.keep_completed), indent=2))
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
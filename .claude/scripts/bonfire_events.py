@@ -0,0 +1,227 @@
+"""
+Shared helpers for reading a bonfire event log.
+
+The coordinator appends one JSON object per line to
+``.claude/bonfire/[plan]/event-log.jsonl``. The scripts in this directory
+read that log for recovery, scheduling and reporting, so the parsing rules
+live here rather than being repeated in each script.
+
+Signals are recognised whether they are recorded as a bare name with a
+separate ``task_id`` field or in the protocol form ``REVIEW_FAILED: task-1-1-1``.
+
+This module is imported by sibling scripts (``python .claude/scripts/x.py``
+puts this directory on ``sys.path``); it is not meant to be run directly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+EVENT_LOG_NAME = "event-log.jsonl"
+STATE_FILE_NAME = "state.json"
+# Bytes of the log mapped at once by iter_lines.
+MAP_WINDOW_BYTES = 64 * 1024 * 1024
+# Bytes of log preceding a saved offset that must still match before resuming from it.
+ANCHOR_BYTES = 256
+
+# Field names the coordinator has used for each piece of an event.
+KIND_KEYS = ("event", "type", "signal")
+TASK_KEYS = ("task_id", "task")
+TIME_KEYS = ("timestamp", "ts", "time")
+AGENT_KEYS = ("agent_type", "agent")
+
+# Signals whose argument is a task id (see the Signal Protocol in README.md).
+TASK_SIGNALS = frozenset({
+    "READY_FOR_REVIEW",
+    "REVIEW_PASSED",
+    "REVIEW_FAILED",
+    "AUDIT_PASSED",
+    "AUDIT_FAILED",
+    "AUDIT_BLOCKED",
+    "INFRA_BLOCKED",
+})
+
+FAILURE_SIGNALS = frozenset({"REVIEW_FAILED", "AUDIT_FAILED"})
+BLOCKED_SIGNALS = frozenset({"AUDIT_BLOCKED", "INFRA_BLOCKED"})
+
+# Which agent type emits each signal; the span for that agent ends at the signal.
+SIGNAL_AGENT = {
+    "READY_FOR_REVIEW": "developer",
+    "INFRA_BLOCKED": "developer",
+    "REVIEW_PASSED": "critic",
+    "REVIEW_FAILED": "critic",
+    "AUDIT_PASSED": "auditor",
+    "AUDIT_FAILED": "auditor",
+    "AUDIT_BLOCKED": "auditor",
+    "REMEDIATION_COMPLETE": "remediation",
+    "HEALTH_AUDIT": "health-auditor",
+    "EXPERT_ADVICE": "expert",
+}
+
+
+@dataclass(frozen=True)
+class Event:
+    """A single parsed event-log line."""
+
+    offset: int
+    """Byte offset of the start of the line."""
+
+    end: int
+    """Byte offset just past the line's newline; the next event starts here."""
+
+    kind: str
+    """Signal or event name, e.g. ``AUDIT_PASSED``."""
+
+    argument: str | None
+    """Text after ``KIND:`` in protocol form, e.g. ``HEALTHY`` or a task id."""
+
+    task_id: str | None
+    timestamp: float | None
+    """Seconds since the epoch, or None when the event carries no usable time."""
+
+    data: dict[str, Any] = field(repr=False)
+
+
+def parse_timestamp(value: Any) -> float | None:
+    """Convert an epoch number or ISO-8601 string to seconds since the epoch."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        # Millisecond epochs are common in JS-produced logs.
+        return value / 1000.0 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        try:
+            return datetime.fromisoformat(text).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _first(data: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def parse_event(line: bytes, offset: int, end: int) -> Event | None:
+    """Parse one log line. Returns None for blank or malformed lines."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        data = json.loads(line)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    raw_kind = _first(data, KIND_KEYS)
+    if not isinstance(raw_kind, str):
+        return None
+    kind, sep, argument = raw_kind.partition(":")
+    kind = kind.strip()
+    argument = argument.strip() if sep else None
+
+    task_id = _first(data, TASK_KEYS)
+    if task_id is None and kind in TASK_SIGNALS and argument:
+        task_id = argument
+    if task_id is not None:
+        task_id = str(task_id)
+
+    return Event(
+        offset=offset,
+        end=end,
+        kind=kind,
+        argument=argument or None,
+        task_id=task_id,
+        timestamp=parse_timestamp(_first(data, TIME_KEYS)),
+        data=data,
+    )
+
+
+def agent_type(event: Event) -> str | None:
+    """The agent type responsible for an event, if it can be determined."""
+    explicit = _first(event.data, AGENT_KEYS)
+    if isinstance(explicit, str):
+        return explicit
+    return SIGNAL_AGENT.get(event.kind)
+
+
+def iter_lines(path: Path, start: int = 0, window: int = MAP_WINDOW_BYTES) -> Iterator[tuple[bytes, int, int]]:
+    """
+    Yield ``(line, offset, end)`` for each complete line from ``start`` onwards.
+
+    The file is read through a memory map so that replaying the tail of a very
+    large log neither copies it into memory nor pays per-line read() syscalls.
+    Only ``window`` bytes are mapped at a time, so resident memory stays
+    bounded however large the log grows; a line longer than the window widens
+    it. A trailing line without a newline is treated as a write in progress
+    and is not yielded, so ``end`` of the last yielded line is always a safe
+    resume point.
+    """
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return
+    if size <= start:
+        return
+
+    with open(path, "rb") as handle:
+        pos = start
+        while pos < size:
+            # Map offsets must be aligned; start the window at or just before pos.
+            base = pos - pos % mmap.ALLOCATIONGRANULARITY
+            length = min(window, size - base)
+            with mmap.mmap(handle.fileno(), length, access=mmap.ACCESS_READ, offset=base) as mm:
+                cursor = pos - base
+                while True:
+                    newline = mm.find(b"\n", cursor)
+                    if newline == -1:
+                        break
+                    yield mm[cursor:newline], base + cursor, base + newline + 1
+                    cursor = newline + 1
+            if base + cursor > pos:
+                pos = base + cursor
+            elif base + length >= size:
+                return
+            else:
+                window *= 2
+
+
+def log_anchor(log_path: Path, offset: int) -> str:
+    """Hash of the log bytes immediately before ``offset``."""
+    begin = max(0, offset - ANCHOR_BYTES)
+    with open(log_path, "rb") as handle:
+        handle.seek(begin)
+        return hashlib.sha256(handle.read(offset - begin)).hexdigest()
+
+
+def iter_events(path: Path, start: int = 0) -> Iterator[Event]:
+    """Yield parsed events from ``start`` onwards, skipping malformed lines."""
+    for line, offset, end in iter_lines(path, start):
+        event = parse_event(line, offset, end)
+        if event is not None:
+            yield event
+
+
+def write_json_atomic(path: Path, payload: Any, indent: int | None = None) -> None:
+    """Write JSON via a temp file and rename so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=indent, separators=None if indent else (",", ":"))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Latency, rework and token metrics for a bonfire run, from the event log.
+
+Tails ``event-log.jsonl`` incrementally: the byte offset reached and the
+running aggregates are checkpointed in ``.claude/bonfire/[plan]/metrics/``,
+so each invocation only reads events appended since the last one. The
+checkpoint also holds a hash of the bytes before its offset, as
+``recover-state.py`` snapshots do, so a replaced or rewritten log is read
+again from the start. Memory is bounded by the number of tasks still in
+flight, not by the size of the log.
+
+Reported:
+    - latency histograms per agent type (developer, critic, auditor,
+      remediation, expert, health-auditor) and per task end to end
+    - queue wait between a task's last signal and its next dispatch
+    - rework loops per completed task
+    - remediation time from AUDIT_BLOCKED / INFRA_BLOCKED to REMEDIATION_COMPLETE
+    - expert consultation round trips (EXPERT_REQUEST -> EXPERT_ADVICE), reported
+      as the expert agent's latency
+    - tokens per agent type, when events carry usage
+
+Spans are also appended to an OpenTelemetry trace file in OTLP/JSON lines
+form (the collector file-exporter format). An OTLP JSON file receiver can
+load it into a local Jaeger or similar. Every task contributes a span per
+agent hand-off, so an unsampled trace runs to roughly two to three times the
+size of the event log. ``--trace-sample`` keeps whole task traces for a
+fraction of tasks, and once the file reaches ``--trace-max-mb`` further spans
+are dropped and counted under ``trace.spans_dropped``.
+
+Usage:
+    python .claude/scripts/event-metrics.py .claude/bonfire/my_plan
+    python .claude/scripts/event-metrics.py .claude/bonfire/my_plan --json
+    python .claude/scripts/event-metrics.py .claude/bonfire/my_plan --reset
+    python .claude/scripts/event-metrics.py .claude/bonfire/my_plan --trace-sample 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import heapq
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+from bonfire_events import (
+    BLOCKED_SIGNALS,
+    EVENT_LOG_NAME,
+    FAILURE_SIGNALS,
+    Event,
+    agent_type,
+    iter_events,
+    log_anchor,
+    write_json_atomic,
+)
+
+METRICS_DIR_NAME = "metrics"
+CHECKPOINT_NAME = "checkpoint.json"
+TRACE_NAME = "trace.otlp.jsonl"
+CHECKPOINT_VERSION = 2
+# Spans are flushed to the trace file, and the checkpoint saved, this often.
+FLUSH_EVERY_EVENTS = 20000
+# The trace file stops growing at this size unless --trace-max-mb says otherwise.
+DEFAULT_TRACE_MAX_MB = 512
+SLOWEST_TASKS = 10
+# Unanswered expert requests older than this many requests are dropped.
+MAX_PENDING_EXPERT_REQUESTS = 10000
+
+# Histogram bucket upper bounds in seconds; a final overflow bucket follows.
+BUCKET_BOUNDS = [1, 5, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 14400, 43200]
+
+DISPATCH_EVENTS = frozenset({"DISPATCH", "DISPATCHED", "TASK_DISPATCHED", "AGENT_DISPATCHED"})
+
+
+# =============================================================================
+# Aggregates
+# =============================================================================
+
+
+def new_histogram() -> dict[str, Any]:
+    return {"counts": [0] * (len(BUCKET_BOUNDS) + 1), "count": 0, "sum": 0.0, "min": None, "max": None}
+
+
+def observe(histogram: dict[str, Any], value: float) -> None:
+    histogram["counts"][bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+    histogram["count"] += 1
+    histogram["sum"] += value
+    histogram["min"] = value if histogram["min"] is None else min(histogram["min"], value)
+    histogram["max"] = value if histogram["max"] is None else max(histogram["max"], value)
+
+
+def quantile(histogram: dict[str, Any], q: float) -> float | None:
+    """Upper bound of the bucket holding the q-th observation (capped at the max seen)."""
+    if not histogram["count"]:
+        return None
+    target = q * histogram["count"]
+    seen = 0
+    for index, count in enumerate(histogram["counts"]):
+        seen += count
+        if seen >= target and count:
+            bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else histogram["max"]
+            return min(bound, histogram["max"])
+    return histogram["max"]
+
+
+class Metrics:
+    """Running aggregates plus the per-task state needed to close open spans."""
+
+    def __init__(self, plan: str, state: dict[str, Any] | None = None, trace_sample: float = 1.0):
+        state = state or {}
+        self.plan = plan
+        # Fraction of traces to keep; 0 disables span building altogether.
+        self.trace_sample = trace_sample
+        self.histograms: dict[str, dict[str, Any]] = state.get("histograms", {})
+        self.tokens: dict[str, int] = state.get("tokens", {})
+        self.counters: dict[str, int] = state.get("counters", {})
+        self.open_tasks: dict[str, dict[str, Any]] = state.get("open_tasks", {})
+        self.blocked_since: float | None = state.get("blocked_since")
+        self.pending_experts: dict[str, float] = state.get("pending_experts", {})
+        self.slowest: list[list[Any]] = state.get("slowest", [])
+        self.spans: list[dict[str, Any]] = []
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "histograms": self.histograms,
+            "tokens": self.tokens,
+            "counters": self.counters,
+            "open_tasks": self.open_tasks,
+            "blocked_since": self.blocked_since,
+            "pending_experts": self.pending_experts,
+            "slowest": self.slowest,
+        }
+
+    def _observe(self, name: str, seconds: float) -> None:
+        observe(self.histograms.setdefault(name, new_histogram()), seconds)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def apply(self, event: Event) -> None:
+        self._count(f"events.{event.kind}")
+        agent = agent_type(event)
+        tokens = _event_tokens(event.data)
+        if tokens:
+            key = agent or "unattributed"
+            self.tokens[key] = self.tokens.get(key, 0) + tokens
+
+        t = event.timestamp
+        if t is None:
+            return
+
+        if event.kind in BLOCKED_SIGNALS and self.blocked_since is None:
+            self.blocked_since = t
+        elif event.kind == "REMEDIATION_COMPLETE" and self.blocked_since is not None:
+            self._observe("remediation", t - self.blocked_since)
+            self._span("remediation", None, self.blocked_since, t, {"bonfire.signal": event.kind})
+            self.blocked_since = None
+
+        if event.kind == "EXPERT_REQUEST":
+            request_id = str(event.data.get("request_id") or event.argument or f"anonymous-{event.offset}")
+            self.pending_experts[request_id] = t
+            if len(self.pending_experts) > MAX_PENDING_EXPERT_REQUESTS:
+                self.pending_experts.pop(next(iter(self.pending_experts)))
+        elif event.kind == "EXPERT_ADVICE" and self.pending_experts:
+            request_id = str(event.data.get("request_id") or event.argument or "")
+            started = self.pending_experts.pop(request_id, None)
+            if started is None:
+                # Unlabelled advice answers the oldest outstanding request.
+                started = self.pending_experts.pop(next(iter(self.pending_experts)))
+            self._observe("agent.expert", t - started)
+            self._span("expert consultation", event.task_id, started, t, {"bonfire.request_id": request_id})
+
+        # Consultations run alongside the task's own work, so they are not part of its span chain.
+        if event.task_id is not None and event.kind not in ("EXPERT_REQUEST", "EXPERT_ADVICE"):
+            self._apply_task_event(event, agent, t)
+
+    def _apply_task_event(self, event: Event, agent: str | None, t: float) -> None:
+        task = self.open_tasks.get(event.task_id)
+        if task is None:
+            # Nothing precedes the first event, so it only opens the task.
+            task = self.open_tasks[event.task_id] = {"start": t, "last": t, "failures": 0}
+        elif event.kind in DISPATCH_EVENTS or event.kind.endswith("_DISPATCHED"):
+            self._observe("queue_wait", t - task["last"])
+            self._span("queue wait", event.task_id, task["last"], t, {})
+        elif agent is not None:
+            self._observe(f"agent.{agent}", t - task["last"])
+            self._span(agent, event.task_id, task["last"], t, {"bonfire.signal": event.kind})
+        else:
+            # Informational events neither close a span nor move the cursor.
+            return
+
+        if event.kind in FAILURE_SIGNALS:
+            task["failures"] += 1
+            self._count(f"rework.{event.kind}")
+        task["last"] = t
+
+        if event.kind == "AUDIT_PASSED":
+            del self.open_tasks[event.task_id]
+            total = t - task["start"]
+            self._observe("task.total", total)
+            self._observe("task.rework_loops", task["failures"])
+            self._count("tasks.completed")
+            self._span("task", event.task_id, task["start"], t,
+                       {"bonfire.rework_loops": task["failures"]}, root=True)
+            entry = [total, event.task_id, task["failures"]]
+            if len(self.slowest) < SLOWEST_TASKS:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def _span(self, name: str, task_id: str | None, start: float, end: float,
+              attributes: dict[str, Any], root: bool = False) -> None:
+        trace_seed = f"{self.plan}/{task_id}" if task_id else f"{self.plan}/{name}/{start}"
+        trace_id = hashlib.sha256(trace_seed.encode()).hexdigest()[:32]
+        # Sampling on the trace id keeps or drops a task's spans together, and
+        # the same tasks are kept on every run with the same rate.
+        if self.trace_sample < 1.0 and int(trace_id[:8], 16) >= self.trace_sample * 0x100000000:
+            return
+        root_id = hashlib.sha256(f"{trace_seed}/root".encode()).hexdigest()[:16]
+        if root or task_id is None:
+            span_id = root_id
+            parent = ""
+        else:
+            span_id = hashlib.sha256(f"{trace_seed}/{name}/{start}".encode()).hexdigest()[:16]
+            parent = root_id
+        attrs = {**({"bonfire.task_id": task_id} if task_id else {}), **attributes}
+        self.spans.append({
+            "traceId": trace_id,
+            "spanId": span_id,
+            "parentSpanId": parent,
+            "name": name,
+            "kind": 1,
+            "startTimeUnixNano": str(int(start * 1e9)),
+            "endTimeUnixNano": str(int(end * 1e9)),
+            "attributes": [_otlp_attribute(k, v) for k, v in attrs.items()],
+        })
+
+
+def _event_tokens(data: dict[str, Any]) -> int:
+    usage = data.get("usage") if isinstance(data.get("usage"), dict) else data
+    for key in ("tokens", "total_tokens"):
+        if isinstance(usage.get(key), int):
+            return usage[key]
+    return sum(usage[key] for key in ("input_tokens", "output_tokens") if isinstance(usage.get(key), int))
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# =============================================================================
+# Incremental processing
+# =============================================================================
+
+
+def flush_spans(metrics: Metrics, trace_path: Path | None, max_bytes: int | None = None) -> None:
+    if trace_path is None or not metrics.spans:
+        metrics.spans.clear()
+        return
+    batch = {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                _otlp_attribute("service.name", "token-bonfire"),
+                _otlp_attribute("bonfire.plan", metrics.plan),
+            ]},
+            "scopeSpans": [{"scope": {"name": "bonfire.event-metrics"}, "spans": metrics.spans}],
+        }]
+    }
+    line = json.dumps(batch, separators=(",", ":")) + "\n"
+    written = trace_path.stat().st_size if trace_path.exists() else 0
+    if max_bytes is not None and written + len(line) > max_bytes:
+        metrics._count("trace.spans_dropped", len(metrics.spans))
+    else:
+        with open(trace_path, "a", encoding="utf-8") as handle:
+            handle.write(line)
+    metrics.spans = []
+
+
+def update(plan_dir: Path, reset: bool, trace: bool, trace_sample: float = 1.0,
+           trace_max_bytes: int | None = DEFAULT_TRACE_MAX_MB * 1024 * 1024) -> tuple[Metrics, dict[str, Any]]:
+    """Process events appended since the last checkpoint."""
+    log_path = plan_dir / EVENT_LOG_NAME
+    metrics_dir = plan_dir / METRICS_DIR_NAME
+    checkpoint_path = metrics_dir / CHECKPOINT_NAME
+    trace_path = metrics_dir / TRACE_NAME if trace else None
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+
+    checkpoint: dict[str, Any] = {}
+    if not reset and checkpoint_path.exists():
+        try:
+            with open(checkpoint_path, encoding="utf-8") as handle:
+                checkpoint = json.load(handle)
+        except (OSError, ValueError):
+            checkpoint = {}
+    if (checkpoint.get("version") != CHECKPOINT_VERSION
+            or checkpoint.get("offset", 0) > os.path.getsize(log_path)
+            or log_anchor(log_path, checkpoint.get("offset", 0)) != checkpoint.get("anchor")):
+        # Missing, unreadable, or the log was replaced or rewritten: start again from the top.
+        checkpoint = {}
+
+    offset = checkpoint.get("offset", 0)
+    metrics = Metrics(plan_dir.name, checkpoint.get("metrics"), trace_sample if trace else 0.0)
+    if trace_path is not None:
+        # Drop any spans written after the last checkpoint so a crash cannot duplicate them.
+        if checkpoint and trace_path.exists():
+            os.truncate(trace_path, min(checkpoint.get("trace_bytes", 0), trace_path.stat().st_size))
+        elif not checkpoint:
+            trace_path.unlink(missing_ok=True)
+
+    def save() -> None:
+        flush_spans(metrics, trace_path, trace_max_bytes)
+        if trace_path is None:
+            # An untraced run leaves the trace file alone, so keep its recorded length.
+            trace_bytes = checkpoint.get("trace_bytes", 0)
+        else:
+            trace_bytes = trace_path.stat().st_size if trace_path.exists() else 0
+        write_json_atomic(checkpoint_path, {
+            "version": CHECKPOINT_VERSION,
+            "offset": offset,
+            "anchor": log_anchor(log_path, offset),
+            "trace_bytes": trace_bytes,
+            "metrics": metrics.to_state(),
+        })
+
+    processed = 0
+    for event in iter_events(log_path, offset):
+        metrics.apply(event)
+        offset = event.end
+        processed += 1
+        if processed % FLUSH_EVERY_EVENTS == 0:
+            save()
+    save()
+    return metrics, {"events_processed": processed, "offset": offset}
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+
+def summarise(metrics: Metrics) -> dict[str, Any]:
+    def describe(histogram: dict[str, Any]) -> dict[str, Any]:
+        count = histogram["count"]
+        return {
+            "count": count,
+            "mean": round(histogram["sum"] / count, 1) if count else None,
+            "p50": quantile(histogram, 0.5),
+            "p90": quantile(histogram, 0.9),
+            "p99": quantile(histogram, 0.99),
+            "max": histogram["max"],
+            "total": round(histogram["sum"], 1),
+        }
+
+    return {
+        "latency_seconds": {name: describe(h) for name, h in sorted(metrics.histograms.items())},
+        "histogram_bounds_seconds": BUCKET_BOUNDS,
+        "histograms": {name: h["counts"] for name, h in sorted(metrics.histograms.items())},
+        "tokens": dict(sorted(metrics.tokens.items())),
+        "counters": dict(sorted(metrics.counters.items())),
+        "open_tasks": len(metrics.open_tasks),
+        "blocked": metrics.blocked_since is not None,
+        "pending_expert_requests": len(metrics.pending_experts),
+        "slowest_tasks": [
+            {"task_id": task_id, "seconds": round(total, 1), "rework_loops": loops}
+            for total, task_id, loops in sorted(metrics.slowest, reverse=True)
+        ],
+    }
+
+
+def print_summary(summary: dict[str, Any], info: dict[str, Any]) -> None:
+    print(f"Processed {info['events_processed']} new events (offset {info['offset']})")
+    print()
+    print(f"{'metric':<24} {'count':>7} {'mean':>9} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>9} {'total':>11}")
+    for name, row in summary["latency_seconds"].items():
+        cells = [row[k] if row[k] is not None else "-" for k in ("mean", "p50", "p90", "p99", "max", "total")]
+        print(f"{name:<24} {row['count']:>7} " + " ".join(
+            f"{c:>{w}}" if isinstance(c, str) else f"{c:>{w}.0f}" for c, w in zip(cells, (9, 7, 7, 7, 9, 11))))
+    if summary["tokens"]:
+        print()
+        print("Tokens by agent type:")
+        for agent, tokens in summary["tokens"].items():
+            print(f"  {agent:<22} {tokens:>12,}")
+    if summary["slowest_tasks"]:
+        print()
+        print("Slowest completed tasks:")
+        for row in summary["slowest_tasks"]:
+            print(f"  {row['task_id']:<22} {row['seconds']:>10.0f}s  rework loops: {row['rework_loops']}")
+    print()
+    print(f"Open tasks: {summary['open_tasks']}  Pending expert requests: {summary['pending_expert_requests']}"
+          f"  Blocked: {'yes' if summary['blocked'] else 'no'}")
+    dropped = summary["counters"].get("trace.spans_dropped")
+    if dropped:
+        print(f"Trace size limit reached: {dropped} spans not written (see --trace-max-mb, --trace-sample)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Agent lifecycle metrics and traces from the event log")
+    parser.add_argument("plan_dir", type=Path, help="Plan state directory (.claude/bonfire/[plan])")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and re-read the whole log")
+    parser.add_argument("--no-trace", action="store_true", help="Do not write the OTLP trace file")
+    parser.add_argument("--trace-sample", type=float, default=1.0,
+                        help="Fraction of task traces to write, chosen by trace id (default: 1.0)")
+    parser.add_argument("--trace-max-mb", type=int, default=DEFAULT_TRACE_MAX_MB,
+                        help=f"Stop writing spans once the trace file reaches this size; 0 for no limit "
+                             f"(default: {DEFAULT_TRACE_MAX_MB})")
+    args = parser.parse_args()
+
+    if not 0.0 < args.trace_sample <= 1.0:
+        print("Error: --trace-sample must be greater than 0 and at most 1", file=sys.stderr)
+        return 1
+
+    if not (args.plan_dir / EVENT_LOG_NAME).exists():
+        print(f"Error: no {EVENT_LOG_NAME} in {args.plan_dir}", file=sys.stderr)
+        return 1
+
+    metrics, info = update(args.plan_dir, args.reset, not args.no_trace, args.trace_sample,
+                           args.trace_max_mb * 1024 * 1024 or None)
+    summary = summarise(metrics)
+    if args.json:
+        print(json.dumps({**info, **summary}, indent=2))
+    else:
+        print_summary(summary, info)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Parse a markdown plan into a task dependency graph.
+
+Reads the plan a line at a time and emits a compact JSON graph of phases,
+tasks, dependencies and acceptance criteria, together with a topological
+order, critical-path lengths and the dispatch waves. The coordinator can then
+answer "what can run next" with a lookup instead of re-reading the plan.
+
+Recognised plan structure (the shape produced by ``/plan``):
+
+    ## Phase 1: Foundations
+    ### Task 1.1: Create project skeleton
+    **Dependencies**: None
+    **Acceptance Criteria**:
+    - `npm test` passes
+
+Task ids are normalised to the signal form (``Task 1.2.3`` -> ``task-1-2-3``).
+Dependencies may name tasks (``Task 1.1``, ``task-1-1``, ``1.1``) or whole
+phases (``Phase 1``). Missing dependencies, duplicate ids and cycles are
+reported before any graph is written; all checks are linear in the size of
+the plan. Dependency items holding a number like ``1.2`` that is not read as
+a reference are listed under ``warnings`` in the graph and printed.
+
+Usage:
+    python .claude/scripts/parse-plan.py parse my_plan.md -o .claude/bonfire/my_plan/task-graph.json
+    python .claude/scripts/parse-plan.py ready .claude/bonfire/my_plan/task-graph.json --slots 5 \\
+        --state .claude/bonfire/my_plan/recovered-state.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from bonfire_events import write_json_atomic
+
+GRAPH_VERSION = 1
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+PHASE_RE = re.compile(r"\bphase[\s-]*(\d+(?:\.\d+)*)\b\s*[:.\-–—]?\s*(.*)", re.IGNORECASE)
+TASK_RE = re.compile(r"\btask[\s-]*(\d+(?:[.-]\d+)*)\b\s*[:.\-–—]?\s*(.*)", re.IGNORECASE)
+# ``**Task 1.1: Title**`` on its own line, for plans that do not use headings for tasks.
+BOLD_TASK_RE = re.compile(r"^\s*(?:[-*]\s+(?:\[.\]\s+)?)?\*\*\s*(task[\s-]*\d+(?:[.-]\d+)*\b.*?)\*\*\s*$", re.IGNORECASE)
+# ``**Label**: value``, ``Label: value`` or ``- **Label:** value``.
+LABEL_RE = re.compile(r"^\s*(?:[-*]\s+)?\*{0,2}([A-Za-z][A-Za-z /]{2,40}?)\*{0,2}\s*:\s*\*{0,2}\s*(.*)$")
+BULLET_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(?:\[[ xX]\]\s+)?(.*\S)\s*$")
+TASK_REF_RE = re.compile(r"\btasks?[\s-]*(\d+(?:[.-]\d+)*)\b", re.IGNORECASE)
+PHASE_REF_RE = re.compile(r"\bphases?[\s-]*(\d+(?:\.\d+)*)\b", re.IGNORECASE)
+# A bare ``1.2`` is only a task reference when it is an entire list item (an
+# annotation such as ``(schema)`` may follow), so version numbers in free text
+# ("Node 18.2") are not mistaken for tasks.
+BARE_REF_RE = re.compile(r"^\s*(\d+(?:\.\d+)+)\.?\s*(?:\([^)\d]*\))?\s*$")
+DOTTED_NUMBER_RE = re.compile(r"\d+\.\d+")
+ITEM_SPLIT_RE = re.compile(r"[,;]|\band\b")
+
+DEPENDENCY_LABELS = {"dependencies", "dependency", "depends on", "depends", "requires", "blocked by"}
+CRITERIA_LABELS = {"acceptance criteria", "acceptance", "done when", "definition of done"}
+NO_DEPENDENCIES = {"none", "n/a", "na", "-", "nothing", "no dependencies"}
+
+
+class PlanError(Exception):
+    """Raised when the plan cannot be turned into a valid task graph."""
+
+    def __init__(self, problems: list[str]):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+@dataclass
+class Task:
+    id: str
+    title: str
+    phase: str | None
+    line: int
+    dependency_text: list[str] = field(default_factory=list)
+    acceptance_criteria: list[str] = field(default_factory=list)
+
+
+def normalise_task_id(number: str) -> str:
+    return "task-" + "-".join(part for part in re.split(r"[.-]", number) if part)
+
+
+def normalise_phase_id(number: str) -> str:
+    return "phase-" + number.replace(".", "-")
+
+
+# =============================================================================
+# Streaming parse
+# =============================================================================
+
+
+def parse_plan(lines: Iterable[str]) -> tuple[list[dict[str, Any]], list[Task]]:
+    """
+    Parse plan lines into phases and tasks in a single pass.
+
+    Only the task currently being read is held open, so memory use is
+    proportional to the extracted graph rather than to the plan text.
+    """
+    phases: list[dict[str, Any]] = []
+    tasks: list[Task] = []
+    current: Task | None = None
+    current_level = 7
+    phase_id: str | None = None
+    section: str | None = None  # "dependencies" | "criteria" | None
+    in_fence = False
+
+    for number, raw in enumerate(lines, start=1):
+        line = raw.rstrip("\n")
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            level, text = len(heading.group(1)), heading.group(2).strip("* ")
+            # Whichever of "Task" / "Phase" opens the heading names it ("## Phase 2: Port task 3").
+            opening = [m for m in (TASK_RE.search(text), PHASE_RE.search(text)) if m and m.start() < 4]
+            first = min(opening, key=lambda m: m.start()) if opening else None
+            task_match = first if first is not None and first.re is TASK_RE else None
+            phase_match = first if first is not None and first.re is PHASE_RE else None
+            label = text.rstrip(":").strip().lower()
+            if task_match:
+                current = Task(normalise_task_id(task_match.group(1)), task_match.group(2).strip() or text,
+                               phase_id, number)
+                current_level = level
+                tasks.append(current)
+                section = None
+            elif phase_match:
+                phase_id = normalise_phase_id(phase_match.group(1))
+                phases.append({"id": phase_id, "title": phase_match.group(2).strip() or text, "tasks": []})
+                current, current_level, section = None, 7, None
+            elif current is not None and level > current_level:
+                section = _section_for(label)
+            else:
+                current, current_level, section = None, 7, None
+            continue
+
+        bold_task = BOLD_TASK_RE.match(line)
+        if bold_task:
+            task_match = TASK_RE.search(bold_task.group(1))
+            current = Task(normalise_task_id(task_match.group(1)), task_match.group(2).strip(" *"),
+                           phase_id, number)
+            current_level = 7
+            tasks.append(current)
+            section = None
+            continue
+
+        if current is None:
+            continue
+
+        labelled = LABEL_RE.match(line)
+        if labelled and _section_for(labelled.group(1).strip().lower()) is not None:
+            section = _section_for(labelled.group(1).strip().lower())
+            value = labelled.group(2).strip().strip("*").strip()
+            if value:
+                _add_to_section(current, section, value)
+            continue
+        if labelled and not BULLET_RE.match(line):
+            section = None
+            continue
+
+        bullet = BULLET_RE.match(line)
+        if bullet and section is not None:
+            _add_to_section(current, section, bullet.group(1))
+        elif not line.strip():
+            continue
+        elif section == "criteria" and current.acceptance_criteria and raw[:1].isspace():
+            current.acceptance_criteria[-1] += " " + line.strip()
+
+    phase_by_id = {phase["id"]: phase for phase in phases}
+    for task in tasks:
+        if task.phase in phase_by_id:
+            phase_by_id[task.phase]["tasks"].append(task.id)
+    return phases, tasks
+
+
+def _section_for(label: str) -> str | None:
+    if label in DEPENDENCY_LABELS:
+        return "dependencies"
+    if label in CRITERIA_LABELS:
+        return "criteria"
+    return None
+
+
+def _add_to_section(task: Task, section: str, text: str) -> None:
+    if section == "dependencies":
+        task.dependency_text.append(text)
+    else:
+        task.acceptance_criteria.append(text)
+
+
+def resolve_dependencies(task: Task, phase_tasks: dict[str, list[str]]) -> tuple[list[str], list[str], list[str]]:
+    """
+    Return ``(dependency ids, unresolved references, unrecognised items)`` for a task.
+
+    Free text without a task or phase reference (e.g. "Redis running") is
+    treated as a note. References to phases that do not exist are unresolved.
+    Items that still hold a dotted number once their references are read
+    (e.g. "1.1 (see 2.3)", "Python 3.11") are returned as unrecognised, since
+    they may be dependencies the parser could not read.
+    """
+    deps: list[str] = []
+    unresolved: list[str] = []
+    unrecognised: list[str] = []
+    for text in task.dependency_text:
+        if text.strip().strip(".").lower() in NO_DEPENDENCIES:
+            continue
+        for item in ITEM_SPLIT_RE.split(text):
+            bare = BARE_REF_RE.match(item)
+            if bare:
+                deps.append(normalise_task_id(bare.group(1)))
+                continue
+            for match in TASK_REF_RE.finditer(item):
+                deps.append(normalise_task_id(match.group(1)))
+            rest = TASK_REF_RE.sub(" ", item)
+            for match in PHASE_REF_RE.finditer(rest):
+                phase = normalise_phase_id(match.group(1))
+                if phase in phase_tasks:
+                    deps.extend(phase_tasks[phase])
+                else:
+                    unresolved.append(match.group(0))
+            if DOTTED_NUMBER_RE.search(PHASE_REF_RE.sub(" ", rest)):
+                unrecognised.append(item.strip())
+
+    unique = list(dict.fromkeys(dep for dep in deps if dep != task.id))
+    return unique, unresolved, unrecognised
+
+
+# =============================================================================
+# Graph
+# =============================================================================
+
+
+def build_graph(phases: list[dict[str, Any]], tasks: list[Task]) -> dict[str, Any]:
+    """Validate the parsed plan and compute order, critical paths and waves."""
+    problems: list[str] = []
+    warnings: list[str] = []
+    by_id: dict[str, Task] = {}
+    for task in tasks:
+        if task.id in by_id:
+            problems.append(f"line {task.line}: duplicate task id {task.id} (first defined on line {by_id[task.id].line})")
+        else:
+            by_id[task.id] = task
+
+    phase_tasks = {phase["id"]: phase["tasks"] for phase in phases}
+    depends_on: dict[str, list[str]] = {}
+    for task in by_id.values():
+        deps, unresolved, unrecognised = resolve_dependencies(task, phase_tasks)
+        for ref in unresolved:
+            problems.append(f"line {task.line}: {task.id} depends on missing phase {ref!r}")
+        for item in unrecognised:
+            warnings.append(f"line {task.line}: {task.id} has a dependency that is not a task or phase "
+                            f"reference: {item!r}")
+        for dep in deps:
+            if dep not in by_id:
+                problems.append(f"line {task.line}: {task.id} depends on missing task {dep}")
+        depends_on[task.id] = [dep for dep in deps if dep in by_id]
+    if problems:
+        raise PlanError(problems)
+
+    dependents: dict[str, list[str]] = {task_id: [] for task_id in by_id}
+    indegree: dict[str, int] = {}
+    for task_id, deps in depends_on.items():
+        indegree[task_id] = len(deps)
+        for dep in deps:
+            dependents[dep].append(task_id)
+
+    # Kahn's algorithm; ties keep plan order so the output is stable.
+    order: list[str] = []
+    wave: dict[str, int] = {}
+    remaining = dict(indegree)
+    queue = deque(task_id for task_id in by_id if remaining[task_id] == 0)
+    for task_id in queue:
+        wave[task_id] = 0
+    while queue:
+        task_id = queue.popleft()
+        order.append(task_id)
+        for child in dependents[task_id]:
+            wave[child] = max(wave.get(child, 0), wave[task_id] + 1)
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                queue.append(child)
+
+    if len(order) != len(by_id):
+        raise PlanError([f"dependency cycle: {' -> '.join(find_cycle(depends_on, remaining))}"])
+
+    # Longest chain of tasks from each task to the end of the plan, inclusive.
+    critical: dict[str, int] = {}
+    for task_id in reversed(order):
+        critical[task_id] = 1 + max((critical[child] for child in dependents[task_id]), default=0)
+
+    waves: list[list[str]] = [[] for _ in range(max(wave.values(), default=-1) + 1)]
+    for task_id in order:
+        waves[wave[task_id]].append(task_id)
+
+    graph_tasks = {}
+    for task_id in by_id:
+        task = by_id[task_id]
+        graph_tasks[task_id] = {
+            "title": task.title,
+            "phase": task.phase,
+            "line": task.line,
+            "depends_on": depends_on[task_id],
+            "dependents": dependents[task_id],
+            "wave": wave[task_id],
+            "critical_path": critical[task_id],
+            "acceptance_criteria": task.acceptance_criteria,
+        }
+
+    return {
+        "version": GRAPH_VERSION,
+        "phases": phases,
+        "tasks": graph_tasks,
+        "order": order,
+        "waves": waves,
+        "critical_path_length": max(critical.values(), default=0),
+        "ready": rank([task_id for task_id in order if indegree[task_id] == 0], graph_tasks),
+        "warnings": warnings,
+    }
+
+
+def find_cycle(depends_on: dict[str, list[str]], remaining: dict[str, int]) -> list[str]:
+    """Walk unfinished dependencies from any stuck task until one repeats."""
+    stuck = {task_id for task_id, count in remaining.items() if count > 0}
+    node = next(task_id for task_id in depends_on if task_id in stuck)
+    seen: dict[str, int] = {}
+    path: list[str] = []
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(dep for dep in depends_on[node] if dep in stuck)
+    return path[seen[node]:] + [node]
+
+
+# =============================================================================
+# Ready-set lookup
+# =============================================================================
+
+
+def rank(task_ids: Iterable[str], tasks: dict[str, Any]) -> list[str]:
+    """Order tasks for dispatch: longest remaining chain first, then most dependents."""
+    position = {task_id: index for index, task_id in enumerate(tasks)}
+    return sorted(task_ids, key=lambda t: (-tasks[t]["critical_path"], -len(tasks[t]["dependents"]), position[t]))
+
+
+def ready_tasks(graph: dict[str, Any], completed: set[str], busy: set[str]) -> list[str]:
+    """Tasks whose dependencies are all complete and that are not already in flight."""
+    tasks = graph["tasks"]
+    candidates = [
+        task_id for task_id, task in tasks.items()
+        if task_id not in completed and task_id not in busy
+        and all(dep in completed for dep in task["depends_on"])
+    ]
+    return rank(candidates, tasks)
+
+
+def completion_from_state(path: Path) -> tuple[set[str], set[str]]:
+    """Read completed and in-flight task ids from a (recovered) state file."""
+    with open(path, encoding="utf-8") as handle:
+        state = json.load(handle)
+    completed: set[str] = set()
+    busy: set[str] = set()
+    for task_id, task in state.get("tasks", {}).items():
+        status = task.get("status") if isinstance(task, dict) else task
+        if status in ("complete", "completed"):
+            completed.add(task_id)
+        elif status not in ("rework", "pending", None):
+            busy.add(task_id)
+    return completed, busy
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parse a plan into a task dependency graph")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    parse = sub.add_parser("parse", help="Parse a plan file and write its task graph")
+    parse.add_argument("plan_file", type=Path)
+    parse.add_argument("-o", "--output", type=Path, help="Write the graph here instead of stdout")
+
+    ready = sub.add_parser("ready", help="List the next tasks to dispatch")
+    ready.add_argument("graph", type=Path, help="task-graph.json produced by 'parse'")
+    ready.add_argument("--slots", type=int, help="Free developer slots to fill (return at most this many tasks)")
+    ready.add_argument("--completed", default="", help="Comma-separated completed task ids")
+    ready.add_argument("--in-progress", default="", help="Comma-separated in-flight task ids")
+    ready.add_argument("--state", type=Path, help="Read completed/in-flight tasks from a state file")
+
+    args = parser.parse_args()
+
+    if args.command == "parse":
+        if not args.plan_file.is_file():
+            print(f"Error: plan file not found: {args.plan_file}", file=sys.stderr)
+            return 1
+        digest = hashlib.sha256()
+        with open(args.plan_file, encoding="utf-8") as handle:
+            def hashed(source):
+                for line in source:
+                    digest.update(line.encode("utf-8"))
+                    yield line
+            phases, tasks = parse_plan(hashed(handle))
+        if not tasks:
+            print(f"Error: no tasks found in {args.plan_file}", file=sys.stderr)
+            return 1
+        try:
+            graph = build_graph(phases, tasks)
+        except PlanError as e:
+            for problem in e.problems:
+                print(f"Error: {problem}", file=sys.stderr)
+            return 1
+        for warning in graph["warnings"]:
+            print(f"Warning: {warning}", file=sys.stderr)
+        graph["source"] = str(args.plan_file)
+        graph["source_sha256"] = digest.hexdigest()
+        if args.output:
+            write_json_atomic(args.output, graph, indent=2)
+            print(f"{len(graph['tasks'])} tasks, {len(graph['waves'])} waves, "
+                  f"critical path {graph['critical_path_length']} -> {args.output}", file=sys.stderr)
+        else:
+            print(json.dumps(graph, indent=2))
+        return 0
+
+    if not args.graph.is_file():
+        print(f"Error: task graph not found: {args.graph}", file=sys.stderr)
+        return 1
+    if args.state and not args.state.is_file():
+        print(f"Error: state file not found: {args.state}", file=sys.stderr)
+        return 1
+    with open(args.graph, encoding="utf-8") as handle:
+        graph = json.load(handle)
+    completed = {t for t in args.completed.split(",") if t}
+    busy = {t for t in args.in_progress.split(",") if t}
+    if args.state:
+        from_state = completion_from_state(args.state)
+        completed |= from_state[0]
+        busy |= from_state[1]
+    result = ready_tasks(graph, completed, busy)
+    if args.slots is not None:
+        result = result[:max(0, args.slots)]
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
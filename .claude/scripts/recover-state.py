@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Rebuild coordinator state from the event log using periodic snapshots.
+
+Replaying the whole of ``event-log.jsonl`` after ``state.json`` is lost gets
+slower as the plan runs. This script writes compact snapshots of the replayed
+state, each recording the byte offset in the event log it covers, and on
+recovery loads the newest valid snapshot and replays only the tail of the log.
+
+Snapshots live in ``.claude/bonfire/[plan]/snapshots/`` and are named by the
+byte offset they cover, so the newest is found without opening the others. A
+snapshot is only trusted if its checksum matches and the log bytes just before
+its offset are unchanged; otherwise an older snapshot (or a full replay) is used.
+
+Usage:
+    python .claude/scripts/recover-state.py snapshot .claude/bonfire/my_plan
+    python .claude/scripts/recover-state.py recover .claude/bonfire/my_plan --write
+    python .claude/scripts/recover-state.py bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from bonfire_events import (
+    BLOCKED_SIGNALS,
+    EVENT_LOG_NAME,
+    FAILURE_SIGNALS,
+    Event,
+    iter_lines,
+    log_anchor,
+    parse_event,
+    write_json_atomic,
+)
+
+SNAPSHOT_DIR_NAME = "snapshots"
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_EVERY = 5000
+DEFAULT_KEEP = 3
+# Written alongside state.json rather than over it, for the coordinator to read on resume.
+RECOVERED_STATE_NAME = "recovered-state.json"
+
+TASK_STATUS = {
+    "READY_FOR_REVIEW": "awaiting_review",
+    "REVIEW_PASSED": "awaiting_audit",
+    "REVIEW_FAILED": "rework",
+    "AUDIT_PASSED": "complete",
+    "AUDIT_FAILED": "rework",
+    "AUDIT_BLOCKED": "blocked",
+    "INFRA_BLOCKED": "blocked",
+}
+
+
+# =============================================================================
+# State reduction
+# =============================================================================
+
+
+def empty_state() -> dict[str, Any]:
+    return {
+        "tasks": {},
+        "counters": {},
+        "health": None,
+        "events_applied": 0,
+        "last_timestamp": None,
+    }
+
+
+def apply_event(state: dict[str, Any], event: Event) -> None:
+    """Fold one event into ``state`` in place."""
+    state["events_applied"] += 1
+    counters = state["counters"]
+    counters[event.kind] = counters.get(event.kind, 0) + 1
+    if event.timestamp is not None:
+        state["last_timestamp"] = event.timestamp
+
+    if event.kind == "HEALTH_AUDIT":
+        state["health"] = event.argument or event.data.get("status")
+
+    if event.task_id is None:
+        return
+
+    task = state["tasks"].setdefault(
+        event.task_id,
+        {"status": "in_progress", "review_failures": 0, "audit_failures": 0},
+    )
+    if event.kind in TASK_STATUS:
+        task["status"] = TASK_STATUS[event.kind]
+    elif isinstance(event.data.get("status"), str):
+        task["status"] = event.data["status"]
+    if event.kind in FAILURE_SIGNALS:
+        key = "review_failures" if event.kind == "REVIEW_FAILED" else "audit_failures"
+        task[key] += 1
+    if event.kind in BLOCKED_SIGNALS:
+        task["blocked_by"] = event.kind
+    else:
+        task.pop("blocked_by", None)
+    task["last_event"] = event.kind
+    if event.timestamp is not None:
+        task["updated"] = event.timestamp
+
+
+def replay(log_path: Path, state: dict[str, Any], start: int) -> tuple[int, int]:
+    """
+    Apply every complete event from byte ``start`` onwards.
+
+    Returns ``(end_offset, events_replayed)``; ``end_offset`` is where the next
+    replay should resume. Malformed lines are skipped but still advance the
+    offset so they are not re-read on every recovery.
+    """
+    end = start
+    count = 0
+    for line, offset, end in iter_lines(log_path, start):
+        event = parse_event(line, offset, end)
+        if event is not None:
+            apply_event(state, event)
+            count += 1
+    return end, count
+
+
+# =============================================================================
+# Snapshots
+# =============================================================================
+
+
+def state_checksum(state: dict[str, Any]) -> str:
+    canonical = json.dumps(state, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def snapshot_path(snapshot_dir: Path, offset: int) -> Path:
+    return snapshot_dir / f"snapshot-{offset:016d}.json"
+
+
+def list_snapshots(snapshot_dir: Path) -> list[Path]:
+    """Snapshot files, newest (largest offset) first."""
+    if not snapshot_dir.is_dir():
+        return []
+    return sorted(snapshot_dir.glob("snapshot-*.json"), reverse=True)
+
+
+def load_snapshot(path: Path, log_path: Path) -> dict[str, Any] | None:
+    """Load a snapshot, returning None if it is unreadable or no longer matches the log."""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            snapshot = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    offset = snapshot.get("offset")
+    state = snapshot.get("state")
+    if not isinstance(offset, int) or not isinstance(state, dict):
+        return None
+    if state_checksum(state) != snapshot.get("checksum"):
+        return None
+    try:
+        if offset > os.path.getsize(log_path):
+            return None
+        if log_anchor(log_path, offset) != snapshot.get("anchor"):
+            return None
+    except OSError:
+        return None
+    return snapshot
+
+
+def write_snapshot(plan_dir: Path, state: dict[str, Any], offset: int, keep: int) -> Path:
+    log_path = plan_dir / EVENT_LOG_NAME
+    snapshot_dir = plan_dir / SNAPSHOT_DIR_NAME
+    path = snapshot_path(snapshot_dir, offset)
+    write_json_atomic(path, {
+        "version": SNAPSHOT_VERSION,
+        "offset": offset,
+        "anchor": log_anchor(log_path, offset),
+        "checksum": state_checksum(state),
+        "created": time.time(),
+        "state": state,
+    })
+    for stale in list_snapshots(snapshot_dir)[keep:]:
+        stale.unlink(missing_ok=True)
+    return path
+
+
+# =============================================================================
+# Recovery
+# =============================================================================
+
+
+def recover(plan_dir: Path) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Rebuild state from the newest valid snapshot plus the log tail.
+
+    Returns ``(state, info)`` where ``info`` describes how recovery went.
+    """
+    log_path = plan_dir / EVENT_LOG_NAME
+    started = time.perf_counter()
+
+    state = empty_state()
+    start = 0
+    used = None
+    rejected = 0
+    snapshot_events = 0
+    for path in list_snapshots(plan_dir / SNAPSHOT_DIR_NAME):
+        snapshot = load_snapshot(path, log_path)
+        if snapshot is None:
+            rejected += 1
+            continue
+        state = snapshot["state"]
+        start = snapshot["offset"]
+        snapshot_events = state["events_applied"]
+        used = path
+        break
+
+    end, tail_events = replay(log_path, state, start)
+    info = {
+        "snapshot": str(used) if used else None,
+        "snapshot_offset": start,
+        "snapshot_events": snapshot_events,
+        "rejected_snapshots": rejected,
+        "tail_events": tail_events,
+        "offset": end,
+        "seconds": round(time.perf_counter() - started, 6),
+    }
+    return state, info
+
+
+def take_snapshot(plan_dir: Path, every: int, keep: int) -> dict[str, Any]:
+    """Write a new snapshot if at least ``every`` events have arrived since the last one."""
+    state, info = recover(plan_dir)
+    info["written"] = None
+    if info["tail_events"] >= every and info["offset"] > info["snapshot_offset"]:
+        info["written"] = str(write_snapshot(plan_dir, state, info["offset"], keep))
+    return info
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+_BENCH_SIGNALS = ["READY_FOR_REVIEW", "REVIEW_PASSED", "REVIEW_FAILED",
+                  "AUDIT_PASSED", "AUDIT_FAILED", "TASK_DISPATCHED"]
+
+
+def _append_synthetic(log_path: Path, count: int, rng: random.Random, first: int) -> None:
+    with open(log_path, "a", encoding="utf-8") as handle:
+        for i in range(first, first + count):
+            handle.write(json.dumps({
+                "timestamp": 1_700_000_000 + i,
+                "event": rng.choice(_BENCH_SIGNALS),
+                "task_id": f"task-{rng.randint(1, 40)}-{rng.randint(1, 25)}",
+                "detail": "x" * rng.randint(20, 120),
+            }) + "\n")
+
+
+def bench(sizes: list[int], every: int) -> None:
+    """Compare full replay against snapshot + tail replay as the log grows."""
+    rng = random.Random(1234)
+    print(f"{'events':>10} {'log MB':>8} {'full replay s':>14} {'snapshot s':>11} {'tail':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        plan_dir = Path(tmp)
+        log_path = plan_dir / EVENT_LOG_NAME
+        written = 0
+        for size in sorted(sizes):
+            _append_synthetic(log_path, size - written, rng, written)
+            written = size
+
+            started = time.perf_counter()
+            replay(log_path, empty_state(), 0)
+            full = time.perf_counter() - started
+
+            # Simulate a coordinator that snapshots every ``every`` events:
+            # the last snapshot is somewhere within the final ``every`` events.
+            take_snapshot(plan_dir, every=1, keep=DEFAULT_KEEP)
+            tail = every // 2
+            _append_synthetic(log_path, tail, rng, written)
+            written += tail
+            _, info = recover(plan_dir)
+
+            mb = os.path.getsize(log_path) / (1024 * 1024)
+            print(f"{size:>10} {mb:>8.1f} {full:>14.3f} {info['seconds']:>11.3f} {info['tail_events']:>6}")
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Snapshot-backed event-log recovery")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    snap = sub.add_parser("snapshot", help="Write a snapshot if enough new events have arrived")
+    snap.add_argument("plan_dir", type=Path, help="Plan state directory (.claude/bonfire/[plan])")
+    snap.add_argument("--every", type=int, default=DEFAULT_SNAPSHOT_EVERY,
+                      help=f"Minimum new events before snapshotting (default {DEFAULT_SNAPSHOT_EVERY})")
+    snap.add_argument("--keep", type=int, default=DEFAULT_KEEP,
+                      help=f"Snapshots to retain (default {DEFAULT_KEEP})")
+
+    rec = sub.add_parser("recover", help="Rebuild state from snapshot + log tail")
+    rec.add_argument("plan_dir", type=Path, help="Plan state directory (.claude/bonfire/[plan])")
+    rec.add_argument("--write", action="store_true",
+                     help=f"Atomically write the result to {RECOVERED_STATE_NAME}")
+
+    ben = sub.add_parser("bench", help="Time recovery against growing synthetic logs")
+    ben.add_argument("--sizes", default="10000,50000,200000,500000",
+                     help="Comma-separated event counts")
+    ben.add_argument("--every", type=int, default=DEFAULT_SNAPSHOT_EVERY)
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench([int(s) for s in args.sizes.split(",") if s], args.every)
+        return 0
+
+    if not (args.plan_dir / EVENT_LOG_NAME).exists():
+        print(f"Error: no {EVENT_LOG_NAME} in {args.plan_dir}", file=sys.stderr)
+        return 1
+
+    if args.command == "snapshot":
+        print(json.dumps(take_snapshot(args.plan_dir, args.every, args.keep), indent=2))
+        return 0
+
+    state, info = recover(args.plan_dir)
+    print(json.dumps(info, indent=2), file=sys.stderr)
+    if args.write:
+        write_json_atomic(args.plan_dir / RECOVERED_STATE_NAME, state, indent=2)
+    else:
+        print(json.dumps(state, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
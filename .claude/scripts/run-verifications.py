@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Run the verification commands from base_variables.md concurrently, with caching.
+
+The health auditor and auditor agents run every verification command
+(typecheck, tests, lint, build) after each task, one after another. This
+runner starts the independent checks at the same time, each in its own
+process. A passing result is cached under a content hash of the files the
+check reads, so a check whose inputs are unchanged since it last passed is
+not run again. With ``--event-log``, a cached pass is only reused if a
+``HEALTH_AUDIT: HEALTHY`` was recorded after it.
+
+Test runs can be narrowed to tests related to the files a task touched
+(``--narrow-tests`` with ``--changed-since`` or ``--changed``). The result is
+printed as JSON for the auditor prompts to consume; the exit code is 0 when
+every check that ran passes.
+
+Commands are run on this host, so only checks with no environment, or the
+environment ``local``, are run by default. ``--environment NAME`` marks
+another environment as executable here; checks for the remaining
+environments are reported as skipped for the auditor to run through that
+environment's own mechanism (e.g. ``devcontainer_exec``).
+
+Usage:
+    python .claude/scripts/run-verifications.py run
+    python .claude/scripts/run-verifications.py run --changed-since HEAD --narrow-tests
+    python .claude/scripts/run-verifications.py run --environment Mac
+    python .claude/scripts/run-verifications.py run --only "Unit Tests" --inputs "Lint=src/**/*.ts"
+    python .claude/scripts/run-verifications.py bench --modules 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from bonfire_events import iter_events, write_json_atomic
+
+DEFAULT_BASE_VARIABLES = Path(".claude/base_variables.md")
+DEFAULT_CACHE_DIR = Path(".claude/bonfire/.verification-cache")
+DEFAULT_TIMEOUT_SECONDS = 900
+OUTPUT_TAIL_CHARS = 4000
+CACHE_VERSION = 1
+MAX_CACHED_RESULTS = 200
+# Environment names that always mean "this host".
+LOCAL_ENVIRONMENTS = frozenset({"", "local"})
+
+# Directories never hashed when the project is not a git repository.
+WALK_EXCLUDES = {".git", "node_modules", "__pycache__", "dist", "build", ".venv", "venv", ".trash", "bonfire"}
+
+TEST_FILE_RE = re.compile(r"^(?:test_(?P<a>.+)|(?P<b>.+?)(?:_test|\.test|\.spec|Test|Tests))$")
+TABLE_ROW_RE = re.compile(r"^\s*\|(.+)\|\s*$")
+
+
+@dataclass
+class Check:
+    name: str
+    command: str
+    environment: str = ""
+    exit_code: int = 0
+    inputs: list[str] = field(default_factory=list)
+    """Glob patterns of files this check reads; empty means the whole project."""
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+
+def parse_checks(base_variables: Path) -> list[Check]:
+    """Read the verification command table (``| Check | Environment | Command | Exit Code | ...``)."""
+    checks: list[Check] = []
+    columns: list[str] | None = None
+    with open(base_variables, encoding="utf-8") as handle:
+        for line in handle:
+            row = TABLE_ROW_RE.match(line)
+            if not row:
+                columns = None
+                continue
+            cells = [cell.strip() for cell in row.group(1).split("|")]
+            lowered = [cell.lower() for cell in cells]
+            if columns is None:
+                if "check" in lowered and "command" in lowered:
+                    columns = lowered
+                continue
+            if all(set(cell) <= set("-: ") for cell in cells):
+                continue
+            values = dict(zip(columns, cells))
+            command = values.get("command", "").strip("`").strip()
+            if not values.get("check") or not command:
+                continue
+            exit_code = values.get("exit code", "0").strip("`") or "0"
+            checks.append(Check(
+                name=values["check"],
+                command=command,
+                environment=values.get("environment", ""),
+                exit_code=int(exit_code) if exit_code.lstrip("-").isdigit() else 0,
+            ))
+    return checks
+
+
+# =============================================================================
+# Input fingerprints
+# =============================================================================
+
+
+def project_files(root: Path, exclude: tuple[str, ...] = ()) -> list[str]:
+    """
+    Tracked and untracked-but-not-ignored files, relative to ``root``.
+
+    Bonfire's own state (``.claude/bonfire/``) and anything under ``exclude``
+    are left out so that writing results does not change the inputs.
+    """
+    exclude = (".claude/bonfire/",) + tuple(e.rstrip("/") + "/" for e in exclude)
+    return [p for p in _list_files(root) if not p.replace(os.sep, "/").startswith(exclude)]
+
+
+def _list_files(root: Path) -> list[str]:
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root, capture_output=True, check=True,
+        )
+        files = [p for p in result.stdout.decode("utf-8", "surrogateescape").split("\0") if p]
+        return sorted(p for p in files if (root / p).is_file())
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    files = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in WALK_EXCLUDES]
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(directory, filename), root))
+    return sorted(files)
+
+
+class FileHasher:
+    """Content hashes of project files, re-reading only files whose size or mtime changed."""
+
+    def __init__(self, root: Path, cache_path: Path | None):
+        self.root = root
+        self.cache_path = cache_path
+        self.entries: dict[str, list[Any]] = {}
+        if cache_path and cache_path.exists():
+            try:
+                with open(cache_path, encoding="utf-8") as handle:
+                    self.entries = json.load(handle)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def digest(self, relpath: str) -> str:
+        try:
+            stat = (self.root / relpath).stat()
+        except OSError:
+            return "missing"
+        cached = self.entries.get(relpath)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        sha = hashlib.sha256()
+        with open(self.root / relpath, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                sha.update(chunk)
+        self.entries[relpath] = [stat.st_size, stat.st_mtime_ns, sha.hexdigest()]
+        return self.entries[relpath][2]
+
+    def save(self) -> None:
+        if self.cache_path:
+            write_json_atomic(self.cache_path, self.entries)
+
+
+def input_key(check: Check, command: str, files: list[str], hasher: FileHasher) -> str:
+    """Cache key covering the exact command, expected exit code and input contents."""
+    sha = hashlib.sha256(f"{CACHE_VERSION}\0{command}\0{check.exit_code}\0".encode())
+    for relpath in files:
+        if not check.inputs or any(fnmatch.fnmatch(relpath, pattern) for pattern in check.inputs):
+            sha.update(f"{relpath}\0{hasher.digest(relpath)}\0".encode("utf-8", "surrogateescape"))
+    return sha.hexdigest()
+
+
+# =============================================================================
+# Test selection
+# =============================================================================
+
+
+def changed_files(root: Path, since: str | None, explicit: list[str]) -> list[str]:
+    changed = set(explicit)
+    if since:
+        for args in (["git", "diff", "--name-only", since], ["git", "ls-files", "--others", "--exclude-standard"]):
+            result = subprocess.run(args, cwd=root, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"{' '.join(args)} failed: {result.stderr.strip()}")
+            changed.update(line for line in result.stdout.splitlines() if line)
+    return sorted(changed)
+
+
+def test_subject(relpath: str) -> str | None:
+    """The module a test file is named after (``test_foo.py`` -> ``foo``), or None if not a test."""
+    match = TEST_FILE_RE.match(Path(relpath).stem)
+    return (match.group("a") or match.group("b")) if match else None
+
+
+def related_tests(changed: list[str], files: list[str]) -> list[str]:
+    """Test files that are, or are named after, a changed file."""
+    by_subject: dict[str, list[str]] = {}
+    for relpath in files:
+        subject = test_subject(relpath)
+        if subject:
+            by_subject.setdefault(subject, []).append(relpath)
+
+    present = set(files)
+    selected: set[str] = set()
+    for relpath in changed:
+        if test_subject(relpath) and relpath in present:
+            selected.add(relpath)
+        selected.update(by_subject.get(Path(relpath).stem, []))
+    return sorted(selected)
+
+
+def narrow_command(command: str, tests: list[str]) -> str:
+    """Substitute ``{files}`` in the command, or append the test files to it."""
+    quoted = " ".join(shlex.quote(t) for t in tests)
+    return command.replace("{files}", quoted) if "{files}" in command else f"{command} {quoted}"
+
+
+# =============================================================================
+# Running
+# =============================================================================
+
+
+def last_healthy_time(event_log: Path) -> float | None:
+    healthy = None
+    for event in iter_events(event_log):
+        if event.kind == "HEALTH_AUDIT" and (event.argument or "").upper().startswith("HEALTHY"):
+            healthy = event.timestamp if event.timestamp is not None else healthy
+    return healthy
+
+
+def runs_locally(check: Check, local_environments: frozenset[str] = frozenset()) -> bool:
+    environment = check.environment.strip()
+    return environment.lower() in LOCAL_ENVIRONMENTS or environment in local_environments
+
+
+def run_check(check: Check, command: str, root: Path, timeout: int) -> dict[str, Any]:
+    started = time.monotonic()
+    try:
+        result = subprocess.run(command, shell=True, cwd=root, capture_output=True, text=True,
+                                errors="replace", timeout=timeout)
+        exit_code, output = result.returncode, result.stdout + result.stderr
+    except subprocess.TimeoutExpired as e:
+        exit_code = None
+        partial = (e.stdout or b"") + (e.stderr or b"")
+        output = partial.decode("utf-8", "replace") if isinstance(partial, bytes) else partial
+        output += f"\n[timed out after {timeout}s]"
+    return {
+        "exit_code": exit_code,
+        "passed": exit_code == check.exit_code,
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "finished_at": time.time(),
+        "output_tail": output[-OUTPUT_TAIL_CHARS:],
+    }
+
+
+def run_all(
+    checks: list[Check],
+    root: Path,
+    cache_dir: Path | None,
+    jobs: int,
+    timeout: int,
+    trusted_after: float | None = None,
+    require_healthy: bool = False,
+    tests: list[str] | None = None,
+    local_environments: frozenset[str] = frozenset(),
+) -> dict[str, Any]:
+    """
+    Run ``checks`` concurrently and return the machine-readable report.
+
+    ``tests``, when given, narrows checks whose name mentions tests. With
+    ``require_healthy``, cached passes are only reused if they finished before
+    ``trusted_after`` (the last ``HEALTH_AUDIT: HEALTHY``). Checks for an
+    environment that is neither local nor in ``local_environments`` are
+    reported as skipped rather than run.
+    """
+    started = time.monotonic()
+    exclude = (os.path.relpath(cache_dir, root),) if cache_dir else ()
+    files = project_files(root, exclude)
+    hasher = FileHasher(root, cache_dir / "file-hashes.json" if cache_dir else None)
+    results_path = cache_dir / "results.json" if cache_dir else None
+    cache: dict[str, Any] = {}
+    if results_path and results_path.exists():
+        try:
+            with open(results_path, encoding="utf-8") as handle:
+                cache = json.load(handle)
+        except (OSError, ValueError):
+            cache = {}
+
+    planned = []
+    for check in checks:
+        command = check.command
+        narrowed = None
+        if tests and "test" in check.name.lower():
+            command = narrow_command(command, tests)
+            narrowed = tests
+        if not runs_locally(check, local_environments):
+            planned.append((check, command, narrowed, None, None))
+            continue
+        key = input_key(check, command, files, hasher)
+        hit = cache.get(key)
+        if hit and require_healthy and (trusted_after is None or hit["finished_at"] > trusted_after):
+            hit = None
+        planned.append((check, command, narrowed, key, hit))
+    hasher.save()
+
+    # Results are keyed by position in planned: check names repeat across environments.
+    to_run = [index for index, (_, _, _, key, hit) in enumerate(planned) if key is not None and hit is None]
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(to_run) or 1))) as pool:
+        fresh = dict(zip(
+            to_run,
+            pool.map(lambda index: run_check(planned[index][0], planned[index][1], root, timeout), to_run),
+        ))
+
+    report_checks = []
+    skipped = 0
+    for index, (check, command, narrowed, key, hit) in enumerate(planned):
+        row = {
+            "name": check.name,
+            "environment": check.environment,
+            "command": command,
+            "expected_exit_code": check.exit_code,
+            "cached": hit is not None,
+            "narrowed_to": narrowed,
+        }
+        if key is None:
+            skipped += 1
+            row["skipped"] = f"environment {check.environment} not executable locally"
+        else:
+            result = dict(hit) if hit else fresh[index]
+            if hit:
+                # Move the entry to the end so trimming keeps the most recently used.
+                cache[key] = cache.pop(key)
+            elif result["passed"]:
+                cache[key] = result
+            row.update(result)
+        report_checks.append(row)
+
+    if results_path:
+        # Entries are in least-recently-used order; keep the newest.
+        write_json_atomic(results_path, dict(list(cache.items())[-MAX_CACHED_RESULTS:]))
+
+    healthy = all(c["passed"] for c in report_checks if "skipped" not in c)
+    return {
+        "status": "HEALTHY" if healthy else "UNHEALTHY",
+        "checks": report_checks,
+        "ran": len(to_run),
+        "cached": len(planned) - len(to_run) - skipped,
+        "skipped": skipped,
+        "duration_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+# =============================================================================
+# Benchmark
+# =============================================================================
+
+
+def bench(modules: int, work: float) -> None:
+    """Serial vs. parallel vs. cached vs. narrowed runs on a synthetic multi-module project."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for i in range(modules):
+            (root / f"pkg/mod{i}").mkdir(parents=True)
+            (root / f"pkg/mod{i}/core{i}.py").write_text(f"def value():\n    return {i}\n")
+            (root / f"pkg/mod{i}/test_core{i}.py").write_text(
+                f"import time\ntime.sleep({work / modules})\nassert {i} == {i}\n")
+        runner = root / "run_tests.py"
+        runner.write_text(
+            "import runpy, sys, glob\n"
+            "for path in sys.argv[1:] or sorted(glob.glob('pkg/*/test_*.py')):\n"
+            "    runpy.run_path(path)\n")
+        py = shlex.quote(sys.executable)
+        sleep = f"{py} -c 'import time; time.sleep({work})'"
+        checks = [
+            Check("Type Check", f"{py} -m compileall -q pkg && {sleep}"),
+            Check("Unit Tests", f"{py} run_tests.py"),
+            Check("Lint", sleep),
+            Check("Build", sleep),
+        ]
+        cache_dir = root / ".cache"
+
+        def timed(label: str, **kwargs: Any) -> None:
+            report = run_all(checks, root, timeout=600, **kwargs)
+            tests = next(c for c in report["checks"] if c["name"] == "Unit Tests")
+            print(f"{label:<36} {report['duration_seconds']:>7.2f}s  tests {tests['duration_seconds']:>5.2f}s  "
+                  f"ran {report['ran']}, cached {report['cached']}, {report['status']}")
+
+        print(f"Synthetic project: {modules} modules, ~{work}s per check")
+        timed("serial, no cache", cache_dir=None, jobs=1)
+        timed("parallel, cold cache", cache_dir=cache_dir, jobs=len(checks))
+        timed("parallel, warm cache", cache_dir=cache_dir, jobs=len(checks))
+        touched = "pkg/mod0/core0.py"
+        (root / touched).write_text("def value():\n    return -1\n")
+        timed("one module changed", cache_dir=cache_dir, jobs=len(checks))
+        (root / touched).write_text("def value():\n    return -2\n")
+        timed("one module changed, narrowed tests", cache_dir=cache_dir, jobs=len(checks),
+              tests=related_tests([touched], project_files(root)))
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parallel, cached verification runner")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the verification commands")
+    run.add_argument("--root", type=Path, default=Path(os.environ.get("CLAUDE_PROJECT_DIR", ".")),
+                     help="Project root (default: $CLAUDE_PROJECT_DIR or the current directory)")
+    run.add_argument("--base-variables", type=Path, help=f"Default: <root>/{DEFAULT_BASE_VARIABLES}")
+    run.add_argument("--only", action="append", default=[], help="Run only this check (repeatable)")
+    run.add_argument("--environment", action="append", default=[],
+                     help="Also run checks for this environment on this host (repeatable); checks for "
+                          "other environments are reported as skipped")
+    run.add_argument("--inputs", action="append", default=[], metavar="CHECK=GLOB[,GLOB]",
+                     help="Restrict the files a check's cache key covers (repeatable)")
+    run.add_argument("--jobs", type=int, default=os.cpu_count() or 4, help="Checks to run at once")
+    run.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT_SECONDS, help="Per-check timeout in seconds")
+    run.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    run.add_argument("--event-log", type=Path,
+                     help="Reuse cached passes only if a later HEALTH_AUDIT: HEALTHY is in this log")
+    run.add_argument("--changed-since", metavar="REF", help="Git ref to diff against for --narrow-tests")
+    run.add_argument("--changed", action="append", default=[], help="Changed file (repeatable)")
+    run.add_argument("--narrow-tests", action="store_true",
+                     help="Run only tests related to the changed files (full suite if none match)")
+    run.add_argument("-o", "--output", type=Path, help="Also write the JSON report here")
+
+    ben = sub.add_parser("bench", help="Benchmark against a synthetic multi-module project")
+    ben.add_argument("--modules", type=int, default=40)
+    ben.add_argument("--work", type=float, default=1.0, help="Seconds of work per check")
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.modules, args.work)
+        return 0
+
+    root = args.root.resolve()
+    base_variables = args.base_variables or root / DEFAULT_BASE_VARIABLES
+    if not base_variables.is_file():
+        print(f"Error: base variables not found: {base_variables}", file=sys.stderr)
+        return 2
+    checks = parse_checks(base_variables)
+    if args.only:
+        checks = [c for c in checks if c.name in args.only]
+    for spec in args.inputs:
+        name, _, globs = spec.partition("=")
+        for check in checks:
+            if check.name == name:
+                check.inputs = [g for g in globs.split(",") if g]
+    if not checks:
+        print("Error: no verification commands to run", file=sys.stderr)
+        return 2
+
+    tests = None
+    if args.narrow_tests:
+        try:
+            changed = changed_files(root, args.changed_since, args.changed)
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        tests = related_tests(changed, project_files(root)) or None
+
+    trusted_after = last_healthy_time(args.event_log) if args.event_log else None
+    report = run_all(
+        checks, root,
+        cache_dir=None if args.no_cache else root / DEFAULT_CACHE_DIR,
+        jobs=args.jobs,
+        timeout=args.timeout,
+        trusted_after=trusted_after,
+        require_healthy=args.event_log is not None,
+        tests=tests,
+        local_environments=frozenset(args.environment),
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0 if report["status"] == "HEALTHY" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Critical-path-aware dispatch ordering for the developer slots.
+
+Filling ``ACTIVE_DEVELOPERS`` slots with whatever tasks happen to be ready
+tends to leave long dependency chains until the end, when most slots sit idle.
+This script ranks ready tasks by the expected time remaining on the longest
+chain they start. Each task's expected time includes its historical rework
+rate, taken from ``REVIEW_FAILED`` / ``AUDIT_FAILED`` events. Ties go to tasks
+that unblock more work.
+
+It also suggests a slot count from measured agent durations and can replay
+past event logs through a simulator to compare the makespan of the current
+FIFO policy with the critical-path policy.
+
+The task graph comes from ``parse-plan.py parse``.
+
+Usage:
+    python .claude/scripts/schedule-dispatch.py rank task-graph.json --event-log event-log.jsonl --slots 5
+    python .claude/scripts/schedule-dispatch.py suggest-slots task-graph.json --event-log event-log.jsonl
+    python .claude/scripts/schedule-dispatch.py simulate task-graph.json --event-log event-log.jsonl --slots 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import json
+import math
+import statistics
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from bonfire_events import FAILURE_SIGNALS, iter_events
+
+DEFAULT_AGENT_TIMEOUT_MS = 900000
+DEFAULT_MAX_SLOTS = 10
+# Rework rate assumed before any history, held as a Beta prior of this many pseudo-rounds
+# (Beta(0.8, 3.2)), so a handful of failures cannot push every task to MAX_REWORK_RATE.
+REWORK_BASE_RATE = 0.2
+REWORK_BASE_WEIGHT = 4.0
+# Weight (in pseudo-rounds) of the phase-wide rework rate when smoothing a task's own history.
+REWORK_PRIOR_WEIGHT = 2.0
+MAX_REWORK_RATE = 0.9
+# A slot count is "enough" once its simulated makespan is within this fraction of the best.
+SLOT_TOLERANCE = 0.05
+
+REVIEW_SIGNALS = frozenset({
+    "REVIEW_PASSED", "REVIEW_FAILED", "AUDIT_PASSED", "AUDIT_FAILED", "AUDIT_BLOCKED",
+})
+
+
+@dataclass
+class TaskHistory:
+    """What the event log says happened to one task."""
+
+    rounds: list[list[float | None]] = field(default_factory=list)
+    """One ``[developer_seconds, review_seconds]`` pair per READY_FOR_REVIEW."""
+
+    failures: float = 0
+    """Failure signals seen; a mean, possibly fractional, once runs are merged."""
+
+    completed: bool = False
+    last_kind: str | None = None
+    last_time: float | None = None
+
+    mean_rounds: float | None = None
+    """Mean round count over merged runs; None for a single run."""
+
+    def round_count(self) -> float:
+        """Rounds to weigh ``failures`` against when estimating the rework rate."""
+        return len(self.rounds) if self.mean_rounds is None else self.mean_rounds
+
+
+def load_history(log_paths: list[Path]) -> dict[str, TaskHistory]:
+    """
+    Build per-task history from one or more event logs.
+
+    Each log is read on its own, so timing never spans two runs, and the
+    results are combined with ``merge_histories``.
+    """
+    return merge_histories([load_log_history(path) for path in log_paths])
+
+
+def load_log_history(log_path: Path) -> dict[str, TaskHistory]:
+    """Per-task history from a single event log, streamed in order."""
+    history: dict[str, TaskHistory] = {}
+    for event in iter_events(log_path):
+        if event.task_id is None:
+            continue
+        task = history.setdefault(event.task_id, TaskHistory())
+        elapsed = None
+        if event.timestamp is not None and task.last_time is not None:
+            elapsed = max(0.0, event.timestamp - task.last_time)
+
+        if event.kind == "READY_FOR_REVIEW":
+            task.rounds.append([elapsed, 0.0])
+        elif event.kind in REVIEW_SIGNALS and task.rounds and elapsed is not None:
+            task.rounds[-1][1] += elapsed
+        if event.kind in FAILURE_SIGNALS:
+            task.failures += 1
+        if event.kind == "AUDIT_PASSED":
+            task.completed = True
+
+        task.last_kind = event.kind
+        if event.timestamp is not None:
+            task.last_time = event.timestamp
+    return history
+
+
+def merge_histories(runs: list[dict[str, TaskHistory]]) -> dict[str, TaskHistory]:
+    """
+    Average several runs of the same plan into one history per task.
+
+    Round count, failures and each round's durations are averaged over the runs
+    that include the task. The averages are kept unrounded for the rework rate,
+    so a failure seen in only some runs still counts; ``rounds`` holds the
+    nearest whole number of rounds for the simulator. Completion and the last
+    event come from the final log only, which ``rank`` and ``suggest-slots``
+    treat as the current run.
+    """
+    if len(runs) == 1:
+        return runs[0]
+    current = runs[-1] if runs else {}
+    merged: dict[str, TaskHistory] = {}
+    for task_id in dict.fromkeys(t for run in runs for t in run):
+        seen = [run[task_id] for run in runs if task_id in run]
+        mean_rounds = statistics.mean(len(h.rounds) for h in seen)
+        rounds: list[list[float | None]] = []
+        for index in range(round(mean_rounds)):
+            developer = [h.rounds[index][0] for h in seen if len(h.rounds) > index and h.rounds[index][0] is not None]
+            review = [h.rounds[index][1] for h in seen if len(h.rounds) > index]
+            rounds.append([
+                statistics.mean(developer) if developer else None,
+                statistics.mean(review) if review else 0.0,
+            ])
+        latest = current.get(task_id)
+        merged[task_id] = TaskHistory(
+            rounds=rounds,
+            failures=statistics.mean(h.failures for h in seen),
+            completed=latest.completed if latest else False,
+            last_kind=latest.last_kind if latest else None,
+            last_time=latest.last_time if latest else None,
+            mean_rounds=mean_rounds,
+        )
+    return merged
+
+
+def load_graph(path: Path) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+# =============================================================================
+# Estimates
+# =============================================================================
+
+
+@dataclass
+class Estimates:
+    developer: float
+    """Typical developer time per round, in seconds (or 1.0 without timestamps)."""
+
+    review: float
+    """Typical critic + auditor time per round."""
+
+    rework: dict[str, float]
+    """Smoothed probability that a round for each task is sent back."""
+
+    def rounds(self, task_id: str) -> float:
+        """Expected number of developer rounds (geometric in the rework rate)."""
+        return 1.0 / (1.0 - self.rework[task_id])
+
+    def duration(self, task_id: str) -> float:
+        return self.rounds(task_id) * (self.developer + self.review)
+
+
+def estimate(graph: dict[str, Any], history: dict[str, TaskHistory]) -> Estimates:
+    developer = [r[0] for h in history.values() for r in h.rounds if r[0] is not None]
+    review = [r[1] for h in history.values() for r in h.rounds if r[1]]
+    dev_median = statistics.median(developer) if developer else 1.0
+    review_median = statistics.median(review) if review else (0.0 if developer else 1.0)
+
+    # The rest of a task's phase, shrunk toward the base rate, is the prior for
+    # its own history. The task's own rounds are left out of its prior so that
+    # they are not counted twice.
+    phase_counts: dict[str | None, list[float]] = {}
+    for task_id, task in graph["tasks"].items():
+        seen = history.get(task_id)
+        if seen and seen.rounds:
+            counts = phase_counts.setdefault(task["phase"], [0.0, 0.0])
+            counts[0] += seen.failures
+            counts[1] += seen.round_count()
+
+    rework: dict[str, float] = {}
+    for task_id, task in graph["tasks"].items():
+        seen = history.get(task_id)
+        own_failures, own_rounds = (seen.failures, seen.round_count()) if seen and seen.rounds else (0, 0)
+        failures, rounds = phase_counts.get(task["phase"], (0.0, 0.0))
+        prior = ((failures - own_failures + REWORK_BASE_WEIGHT * REWORK_BASE_RATE)
+                 / (rounds - own_rounds + REWORK_BASE_WEIGHT))
+        rate = (own_failures + REWORK_PRIOR_WEIGHT * prior) / (own_rounds + REWORK_PRIOR_WEIGHT)
+        rework[task_id] = min(rate, MAX_REWORK_RATE)
+
+    return Estimates(dev_median, review_median, rework)
+
+
+def bottom_levels(graph: dict[str, Any], estimates: Estimates) -> dict[str, float]:
+    """Expected time from starting each task to finishing the longest chain it heads."""
+    tasks = graph["tasks"]
+    level: dict[str, float] = {}
+    for task_id in reversed(graph["order"]):
+        tail = max((level[child] for child in tasks[task_id]["dependents"]), default=0.0)
+        level[task_id] = estimates.duration(task_id) + tail
+    return level
+
+
+def priority_key(graph: dict[str, Any], estimates: Estimates) -> Callable[[str], tuple]:
+    level = bottom_levels(graph, estimates)
+    position = {task_id: index for index, task_id in enumerate(graph["order"])}
+    tasks = graph["tasks"]
+    return lambda t: (-level[t], -len(tasks[t]["dependents"]), -estimates.rework[t], position[t])
+
+
+# =============================================================================
+# Ranking
+# =============================================================================
+
+
+def rank_ready(graph: dict[str, Any], history: dict[str, TaskHistory]) -> list[dict[str, Any]]:
+    """Ready tasks (dependencies complete, not in flight) in dispatch order."""
+    estimates = estimate(graph, history)
+    level = bottom_levels(graph, estimates)
+    key = priority_key(graph, estimates)
+    completed = {t for t, h in history.items() if h.completed}
+    # A task whose last event was a failure is waiting for rework; anything else
+    # seen but not complete is already with an agent.
+    busy = {t for t, h in history.items()
+            if not h.completed and h.last_kind is not None and h.last_kind not in FAILURE_SIGNALS}
+
+    ready = [
+        task_id for task_id, task in graph["tasks"].items()
+        if task_id not in completed and task_id not in busy
+        and all(dep in completed for dep in task["depends_on"])
+    ]
+    return [
+        {
+            "task_id": task_id,
+            "remaining_critical_path": round(level[task_id], 1),
+            "dependents": len(graph["tasks"][task_id]["dependents"]),
+            "rework_rate": round(estimates.rework[task_id], 3),
+            "rework": task_id in history and not history[task_id].completed,
+        }
+        for task_id in sorted(ready, key=key)
+    ]
+
+
+# =============================================================================
+# Simulation
+# =============================================================================
+
+
+def task_rounds(task_id: str, history: dict[str, TaskHistory], estimates: Estimates) -> list[tuple[float, float]]:
+    """
+    Observed ``(developer, review)`` rounds for a task, filling gaps with estimates.
+
+    A task whose log ends on a failure still has rework to do, so the expected
+    number of further rounds (at least one) is added after the observed ones.
+    """
+    expected = [(estimates.developer, estimates.review)] * max(1, round(estimates.rounds(task_id)))
+    seen = history.get(task_id)
+    if not seen or not seen.rounds:
+        return expected
+    observed = [
+        (dev if dev is not None else estimates.developer, review or estimates.review)
+        for dev, review in seen.rounds
+    ]
+    if not seen.completed and seen.last_kind in FAILURE_SIGNALS:
+        observed += expected
+    return observed
+
+
+def simulate(
+    graph: dict[str, Any],
+    rounds: dict[str, list[tuple[float, float]]],
+    slots: int,
+    key: Callable[[str], tuple] | None,
+) -> float:
+    """
+    Replay the plan with ``slots`` developer slots and return the makespan.
+
+    Each round holds a slot for its developer time, then spends its review time
+    with the critic and auditor without a slot. A rework round re-enters the
+    ready queue. ``key`` orders the ready queue; None means FIFO.
+    """
+    tasks = graph["tasks"]
+    waiting = {task_id: len(task["depends_on"]) for task_id, task in tasks.items()}
+    next_round = dict.fromkeys(tasks, 0)
+    arrival = itertools.count()
+
+    ready: list[tuple] = []
+
+    def make_ready(task_id: str) -> None:
+        order = next(arrival)
+        heapq.heappush(ready, ((key(task_id) if key else ()) + (order,), task_id))
+
+    for task_id in graph["order"]:
+        if waiting[task_id] == 0:
+            make_ready(task_id)
+
+    timeline: list[tuple[float, int, str, str]] = []
+    tie = itertools.count()
+    now = 0.0
+    free = slots
+    while ready or timeline:
+        while free and ready:
+            _, task_id = heapq.heappop(ready)
+            free -= 1
+            developer, _ = rounds[task_id][next_round[task_id]]
+            heapq.heappush(timeline, (now + developer, next(tie), "developed", task_id))
+        if not timeline:
+            break
+        now, _, what, task_id = heapq.heappop(timeline)
+        if what == "developed":
+            free += 1
+            _, review = rounds[task_id][next_round[task_id]]
+            heapq.heappush(timeline, (now + review, next(tie), "reviewed", task_id))
+            continue
+        next_round[task_id] += 1
+        if next_round[task_id] < len(rounds[task_id]):
+            make_ready(task_id)
+            continue
+        for child in tasks[task_id]["dependents"]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                make_ready(child)
+    return now
+
+
+def compare_policies(graph: dict[str, Any], history: dict[str, TaskHistory], slots: int) -> dict[str, float]:
+    estimates = estimate(graph, history)
+    rounds = {task_id: task_rounds(task_id, history, estimates) for task_id in graph["tasks"]}
+    fifo = simulate(graph, rounds, slots, None)
+    critical = simulate(graph, rounds, slots, priority_key(graph, estimates))
+    return {
+        "slots": slots,
+        "fifo_makespan": fifo,
+        "critical_path_makespan": critical,
+        "improvement": (fifo - critical) / fifo if fifo else 0.0,
+    }
+
+
+# =============================================================================
+# Slot suggestion
+# =============================================================================
+
+
+def suggest_slots(
+    graph: dict[str, Any],
+    history: dict[str, TaskHistory],
+    max_slots: int,
+    agent_timeout_ms: int,
+) -> dict[str, Any]:
+    """Smallest slot count whose simulated makespan is close to the best achievable."""
+    estimates = estimate(graph, history)
+    key = priority_key(graph, estimates)
+    remaining = {t for t in graph["tasks"] if not (t in history and history[t].completed)}
+    rounds = {
+        task_id: [(estimates.developer, estimates.review)] * max(1, round(estimates.rounds(task_id)))
+        for task_id in graph["tasks"]
+    }
+    # Simulate only the remaining work: completed tasks take no time.
+    for task_id in graph["tasks"]:
+        if task_id not in remaining:
+            rounds[task_id] = [(0.0, 0.0)]
+
+    makespans = {n: simulate(graph, rounds, n, key) for n in range(1, max_slots + 1)}
+    best = min(makespans.values())
+    suggested = next(n for n, span in sorted(makespans.items()) if span <= best * (1 + SLOT_TOLERANCE))
+
+    developer = sorted(r[0] for h in history.values() for r in h.rounds if r[0] is not None)
+    timeout = agent_timeout_ms / 1000.0
+    result: dict[str, Any] = {
+        "suggested_slots": suggested,
+        "remaining_tasks": len(remaining),
+        "makespan_by_slots": {n: round(span, 1) for n, span in makespans.items()},
+        "developer_rounds_measured": len(developer),
+    }
+    if developer:
+        p95 = developer[min(len(developer) - 1, math.ceil(0.95 * len(developer)) - 1)]
+        over = sum(1 for d in developer if d >= timeout)
+        result["developer_median_seconds"] = round(statistics.median(developer), 1)
+        result["developer_p95_seconds"] = round(p95, 1)
+        result["rounds_at_or_over_timeout"] = over
+        if p95 >= 0.8 * timeout:
+            result["warning"] = (
+                f"p95 developer time {p95:.0f}s is at least 80% of AGENT_TIMEOUT ({timeout:.0f}s); "
+                "split large tasks or raise AGENT_TIMEOUT before adding slots"
+            )
+    return result
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Critical-path-aware dispatch scheduling")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p: argparse.ArgumentParser) -> None:
+        p.add_argument("graph", type=Path, help="task-graph.json produced by parse-plan.py")
+        p.add_argument("--event-log", type=Path, action="append", default=[],
+                       help="Event log to learn from (repeatable; runs are averaged, the last is the current run)")
+
+    rank = sub.add_parser("rank", help="Ready tasks in dispatch priority order")
+    common(rank)
+    rank.add_argument("--slots", type=int, help="Free developer slots to fill (return at most this many tasks)")
+
+    slots = sub.add_parser("suggest-slots", help="Suggest a developer slot count")
+    common(slots)
+    slots.add_argument("--max-slots", type=int, default=DEFAULT_MAX_SLOTS)
+    slots.add_argument("--agent-timeout", type=int, default=DEFAULT_AGENT_TIMEOUT_MS,
+                       help=f"AGENT_TIMEOUT in ms (default {DEFAULT_AGENT_TIMEOUT_MS})")
+
+    sim = sub.add_parser("simulate", help="Compare FIFO and critical-path makespan on past logs")
+    common(sim)
+    sim.add_argument("--slots", type=int, default=5, help="ACTIVE_DEVELOPERS to simulate (default 5)")
+
+    args = parser.parse_args()
+
+    if not args.graph.is_file():
+        print(f"Error: task graph not found: {args.graph}", file=sys.stderr)
+        return 1
+    for log_path in args.event_log:
+        if not log_path.is_file():
+            print(f"Error: event log not found: {log_path}", file=sys.stderr)
+            return 1
+
+    graph = load_graph(args.graph)
+    history = load_history(args.event_log)
+
+    if args.command == "rank":
+        ranked = rank_ready(graph, history)
+        if args.slots is not None:
+            ranked = ranked[:max(0, args.slots)]
+        print(json.dumps(ranked, indent=2))
+    elif args.command == "suggest-slots":
+        print(json.dumps(suggest_slots(graph, history, args.max_slots, args.agent_timeout), indent=2))
+    else:
+        result = compare_policies(graph, history, args.slots)
+        print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the script tests.
+
+The scripts are run as ``python .claude/scripts/<name>.py`` and have hyphenated
+names, so they are loaded here by path rather than imported.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def load_script(name: str) -> ModuleType:
+    """Import ``.claude/scripts/<name>.py`` as a module."""
+    module_name = name.replace("-", "_")
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_events(path: Path, events: list[dict], mode: str = "w") -> None:
+    with open(path, mode, encoding="utf-8") as handle:
+        for event in events:
+            handle.write(json.dumps(event) + "\n")
+
+
+@pytest.fixture
+def plan_dir(tmp_path: Path) -> Path:
+    directory = tmp_path / "my_plan"
+    directory.mkdir()
+    return directory
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+
+from conftest import load_script
+
+artefact_store = load_script("artefact-store")
+
+
+def _store(plan_dir):
+    plan_dir.mkdir(exist_ok=True)
+    return artefact_store.ArtefactStore(plan_dir)
+
+
+def test_puts_in_the_same_round_merge(plan_dir):
+    store = _store(plan_dir)
+    with store.locked(write=True):
+        first = store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": b"diff"})
+        second = store.put("task-1-1", "READY_FOR_REVIEW", {"test.log": b"log"})
+        review = store.put("task-1-1", "REVIEW_FAILED", {"review.md": b"fix"})
+        notes = store.put("task-1-1", "REVIEW_FAILED", {"notes.md": b"more"})
+        resubmitted = store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": b"diff 2"})
+    assert (first, second, review, notes, resubmitted) == (1, 1, 1, 1, 2)
+    assert store.rounds("task-1-1")["1"] == {
+        "READY_FOR_REVIEW": {"diff.patch": store.find("task-1-1", "diff.patch", 1, None),
+                             "test.log": store.find("task-1-1", "test.log", 1, None)},
+        "REVIEW_FAILED": {"review.md": store.find("task-1-1", "review.md", 1, None),
+                          "notes.md": store.find("task-1-1", "notes.md", 1, None)},
+    }
+
+
+def test_delta_reports_changes_since_previous_round(plan_dir):
+    store = _store(plan_dir)
+    with store.locked(write=True):
+        store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": b"a\nb\n", "test.log": b"ok\n"})
+        store.put("task-1-1", "AUDIT_FAILED", {"audit.md": b"no"})
+        store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": b"a\nc\n"})
+    with store.locked():
+        delta = store.delta("task-1-1")
+    assert (delta["from_round"], delta["to_round"], delta["unchanged"]) == (1, 2, 2)
+    [change] = delta["changes"]
+    assert change["artefact"] == "READY_FOR_REVIEW/diff.patch"
+    assert "-b\n+c\n" in change["diff"]
+
+
+def test_reads_do_not_rewrite_the_manifest(plan_dir):
+    store = _store(plan_dir)
+    with store.locked(write=True):
+        store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": b"diff"})
+    before = store.manifest_path.stat().st_mtime_ns
+    os.utime(store.manifest_path, ns=(before - 10**9, before - 10**9))
+
+    reader = artefact_store.ArtefactStore(plan_dir)
+    with reader.locked():
+        digest = reader.find("task-1-1", "diff.patch", None, None)
+        assert reader.read_blob(digest) == b"diff"
+    assert store.manifest_path.stat().st_mtime_ns == before - 10**9
+
+
+def test_gc_keeps_the_latest_two_rounds_of_open_tasks(plan_dir):
+    store = _store(plan_dir)
+    with store.locked(write=True):
+        store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": os.urandom(4000)})
+        store.put("task-1-1", "REVIEW_FAILED", {"first.md": os.urandom(4000)})
+        store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": b"a\nb\n"})
+        store.put("task-1-1", "REVIEW_FAILED", {"review.md": b"fix b"})
+        store.put("task-1-1", "READY_FOR_REVIEW", {"diff.patch": b"a\nc\n"})
+        store.put("task-1-2", "READY_FOR_REVIEW", {"done.patch": os.urandom(4000)})
+    # The open rounds are the least recently used, so plain LRU would evict them first.
+    for name in ("diff.patch", "review.md"):
+        os.utime(store._object_path(store.find("task-1-1", name, None, None)), (0, 0))
+
+    with store.locked(write=True):
+        result = store.gc(0, completed={"task-1-2"})
+    assert result["dropped_tasks"] == ["task-1-2"]
+    assert store.find("task-1-1", "first.md", None, None) is None
+    assert store.find("task-1-1", "review.md", None, None) is not None
+
+    with store.locked():
+        [change] = store.delta("task-1-1")["changes"]
+    assert change["status"] == "modified"
+    assert "-b\n+c\n" in change["diff"]
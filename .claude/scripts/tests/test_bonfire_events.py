@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import bonfire_events
+
+
+def test_protocol_form_signal_carries_task_id():
+    event = bonfire_events.parse_event(b'{"event": "REVIEW_FAILED: task-1-2", "timestamp": 5}', 0, 10)
+    assert (event.kind, event.task_id, event.timestamp) == ("REVIEW_FAILED", "task-1-2", 5.0)
+
+
+def test_non_task_argument_is_not_a_task_id():
+    event = bonfire_events.parse_event(b'{"type": "HEALTH_AUDIT: HEALTHY"}', 0, 10)
+    assert event.argument == "HEALTHY"
+    assert event.task_id is None
+
+
+def test_iso_and_millisecond_timestamps():
+    assert bonfire_events.parse_timestamp("1970-01-01T00:01:00Z") == 60.0
+    assert bonfire_events.parse_timestamp(1_700_000_000_000) == 1_700_000_000.0
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    log = tmp_path / "event-log.jsonl"
+    log.write_text('{"event": "A"}\nnot json\n[1]\n{"event": "B"}\n')
+    assert [e.kind for e in bonfire_events.iter_events(log)] == ["A", "B"]
+
+
+def test_small_map_window_yields_the_same_lines(tmp_path):
+    log = tmp_path / "event-log.jsonl"
+    lines = [f'{{"event": "E{i}", "pad": "{"x" * (i * 997 % 9000)}"}}' for i in range(200)]
+    log.write_text("\n".join(lines) + "\npartial")
+    whole = list(bonfire_events.iter_lines(log))
+    windowed = list(bonfire_events.iter_lines(log, window=4096))
+    assert windowed == whole
+    assert [line.decode() for line, _, _ in windowed] == lines
+    assert windowed[-1][2] == log.stat().st_size - len("partial")
+
+    resume = windowed[120][1]
+    assert list(bonfire_events.iter_lines(log, resume, window=4096)) == whole[120:]
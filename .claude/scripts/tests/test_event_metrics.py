@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+
+from conftest import load_script, write_events
+
+event_metrics = load_script("event-metrics")
+
+
+def _task_events(task: int, start: int) -> list[dict]:
+    return [
+        {"timestamp": start, "event": "DISPATCHED", "task_id": f"task-1-{task}"},
+        {"timestamp": start + 60, "event": f"READY_FOR_REVIEW: task-1-{task}"},
+        {"timestamp": start + 90, "event": f"REVIEW_PASSED: task-1-{task}"},
+        {"timestamp": start + 120, "event": f"AUDIT_PASSED: task-1-{task}"},
+    ]
+
+
+def _events(tasks: range) -> list[dict]:
+    return [e for t in tasks for e in _task_events(t, 1_700_000_000 + t * 200)]
+
+
+def _span_count(trace_path) -> int:
+    with open(trace_path, encoding="utf-8") as handle:
+        return sum(len(batch["resourceSpans"][0]["scopeSpans"][0]["spans"])
+                   for batch in map(json.loads, handle))
+
+
+def test_incremental_update_matches_full_read(plan_dir):
+    log = plan_dir / "event-log.jsonl"
+    write_events(log, _events(range(10)))
+    event_metrics.update(plan_dir, reset=False, trace=True)
+    write_events(log, _events(range(10, 25)), mode="a")
+    incremental, info = event_metrics.update(plan_dir, reset=False, trace=True)
+    assert info["events_processed"] == 60
+    trace = plan_dir / "metrics" / "trace.otlp.jsonl"
+    incremental_spans = _span_count(trace)
+
+    full, _ = event_metrics.update(plan_dir, reset=True, trace=True)
+    assert event_metrics.summarise(incremental) == event_metrics.summarise(full)
+    assert incremental_spans == _span_count(trace) == 25 * 4
+
+
+def test_untraced_run_keeps_existing_spans(plan_dir):
+    log = plan_dir / "event-log.jsonl"
+    write_events(log, _events(range(5)))
+    event_metrics.update(plan_dir, reset=False, trace=True)
+    trace = plan_dir / "metrics" / "trace.otlp.jsonl"
+    before = _span_count(trace)
+
+    write_events(log, _events(range(5, 8)), mode="a")
+    event_metrics.update(plan_dir, reset=False, trace=False)
+    write_events(log, _events(range(8, 10)), mode="a")
+    event_metrics.update(plan_dir, reset=False, trace=True)
+
+    assert before == 5 * 4
+    assert _span_count(trace) == before + 2 * 4
+
+
+def test_trace_sampling_keeps_whole_tasks(plan_dir):
+    write_events(plan_dir / "event-log.jsonl", _events(range(200)))
+    event_metrics.update(plan_dir, reset=False, trace=True, trace_sample=0.25)
+    with open(plan_dir / "metrics" / "trace.otlp.jsonl", encoding="utf-8") as handle:
+        spans = [s for batch in map(json.loads, handle)
+                 for s in batch["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    per_trace: dict[str, int] = {}
+    for span in spans:
+        per_trace[span["traceId"]] = per_trace.get(span["traceId"], 0) + 1
+    assert 20 < len(per_trace) < 80
+    assert set(per_trace.values()) == {4}
+
+
+def test_trace_size_limit_drops_and_counts_spans(plan_dir):
+    write_events(plan_dir / "event-log.jsonl", _events(range(50)))
+    metrics, _ = event_metrics.update(plan_dir, reset=False, trace=True, trace_max_bytes=100)
+    assert not (plan_dir / "metrics" / "trace.otlp.jsonl").exists()
+    assert metrics.counters["trace.spans_dropped"] == 50 * 4
+
+
+def test_rewritten_log_is_read_from_the_start(plan_dir):
+    log = plan_dir / "event-log.jsonl"
+    write_events(log, _events(range(5)))
+    event_metrics.update(plan_dir, reset=False, trace=False)
+
+    # A different run of at least the same length: the old offset is still in range.
+    write_events(log, _events(range(100, 110)))
+    metrics, info = event_metrics.update(plan_dir, reset=False, trace=False)
+    assert info["events_processed"] == 40
+    assert metrics.counters["tasks.completed"] == 10
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPTS_DIR, load_script
+
+parse_plan = load_script("parse-plan")
+
+
+def _graph(text: str) -> dict:
+    phases, tasks = parse_plan.parse_plan(text.splitlines(keepends=True))
+    return parse_plan.build_graph(phases, tasks)
+
+
+PLAN = """\
+## Phase 1: Foundations
+### Task 1.1: Skeleton
+**Dependencies**: None
+**Acceptance Criteria**:
+- `npm test` passes
+### Task 1.2: Models
+- **Depends on:** Task 1.1
+## Phase 2: API
+### Task 2.1: Endpoints
+**Dependencies**:
+- Phase 1
+**Task 2.2: Docs**
+Dependencies: 1.1, task-2-1
+```
+### Task 9.9: inside a fence
+```
+"""
+
+
+def test_parses_phases_tasks_and_dependencies():
+    graph = _graph(PLAN)
+    tasks = graph["tasks"]
+    assert list(tasks) == ["task-1-1", "task-1-2", "task-2-1", "task-2-2"]
+    assert tasks["task-1-1"]["acceptance_criteria"] == ["`npm test` passes"]
+    assert tasks["task-2-1"]["depends_on"] == ["task-1-1", "task-1-2"]
+    assert sorted(tasks["task-2-2"]["depends_on"]) == ["task-1-1", "task-2-1"]
+    assert graph["order"] == ["task-1-1", "task-1-2", "task-2-1", "task-2-2"]
+    assert tasks["task-1-1"]["critical_path"] == graph["critical_path_length"] == 4
+    assert graph["ready"] == ["task-1-1"]
+
+
+def test_missing_dependency_is_reported():
+    with pytest.raises(parse_plan.PlanError) as error:
+        _graph("### Task 1: a\nDepends on: Task 7\n")
+    assert "depends on missing task task-7" in str(error.value)
+
+
+def test_cycle_is_reported():
+    plan = "### Task 1: a\nDepends on: Task 3\n### Task 2: b\nDepends on: Task 1\n### Task 3: c\nDepends on: Task 2\n"
+    with pytest.raises(parse_plan.PlanError) as error:
+        _graph(plan)
+    assert "dependency cycle: task-1 -> task-3 -> task-2 -> task-1" in str(error.value)
+
+
+def test_version_numbers_in_dependency_text_are_not_tasks():
+    plan = (
+        "### Task 1.1: a\n**Dependencies**: None\n"
+        "### Task 1.2: b\n**Dependencies**: Task 1.1 (needs Node 18.2 installed by it)\n"
+        "- Python 3.11\n"
+    )
+    assert _graph(plan)["tasks"]["task-1-2"]["depends_on"] == ["task-1-1"]
+
+
+def test_ready_respects_completed_and_in_flight():
+    graph = _graph(PLAN)
+    assert parse_plan.ready_tasks(graph, {"task-1-1"}, set()) == ["task-1-2"]
+    assert parse_plan.ready_tasks(graph, {"task-1-1"}, {"task-1-2"}) == []
+
+
+def test_ready_reports_missing_graph(tmp_path):
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "parse-plan.py"), "ready", str(tmp_path / "nope.json")],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 1
+    assert result.stderr.startswith("Error: task graph not found")
+
+
+def test_ready_slots_limits_result_count(tmp_path):
+    graph_path = tmp_path / "g.json"
+    graph_path.write_text(json.dumps(_graph("### Task 1: a\n### Task 2: b\n### Task 3: c\n")))
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "parse-plan.py"), "ready", str(graph_path),
+         "--slots", "2", "--in-progress", "task-3"],
+        capture_output=True, text=True, check=True,
+    )
+    assert json.loads(result.stdout) == ["task-1", "task-2"]
+
+
+def test_phase_heading_mentioning_a_task_is_a_phase():
+    plan = (
+        "## Phase 1: Base\n### Task 1.1: a\n"
+        "## Phase 2: Port task 3 outputs\n### Task 2.1: b\n"
+        "### Task 2.2: c\n**Dependencies**: Phase 2\n"
+    )
+    graph = _graph(plan)
+    assert [p["id"] for p in graph["phases"]] == ["phase-1", "phase-2"]
+    assert graph["tasks"]["task-2-1"]["phase"] == "phase-2"
+    assert graph["tasks"]["task-2-2"]["depends_on"] == ["task-2-1"]
+
+
+def test_plural_and_annotated_references_resolve():
+    plan = (
+        "### Task 1.1: a\n### Task 1.2: b\n"
+        "### Task 1.3: c\n**Dependencies**: Tasks 1.1, 1.2\n"
+        "### Task 1.4: d\n**Dependencies**: 1.1 (schema)\n"
+    )
+    graph = _graph(plan)
+    assert graph["tasks"]["task-1-3"]["depends_on"] == ["task-1-1", "task-1-2"]
+    assert graph["tasks"]["task-1-4"]["depends_on"] == ["task-1-1"]
+    assert graph["warnings"] == []
+
+
+def test_unread_dotted_numbers_are_reported():
+    plan = "### Task 1.1: a\n### Task 1.2: b\n**Dependencies**: 1.1 (see 2.3)\n- Python 3.11\n"
+    graph = _graph(plan)
+    assert graph["tasks"]["task-1-2"]["depends_on"] == []
+    assert graph["warnings"] == [
+        "line 2: task-1-2 has a dependency that is not a task or phase reference: '1.1 (see 2.3)'",
+        "line 2: task-1-2 has a dependency that is not a task or phase reference: 'Python 3.11'",
+    ]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+
+from conftest import load_script, write_events
+
+recover_state = load_script("recover-state")
+
+
+def _events(count: int, start: int = 0) -> list[dict]:
+    signals = ["READY_FOR_REVIEW", "REVIEW_FAILED", "REVIEW_PASSED", "AUDIT_PASSED"]
+    return [
+        {"timestamp": 1_700_000_000 + i, "event": f"{signals[i % 4]}: task-1-{i % 7}"}
+        for i in range(start, start + count)
+    ]
+
+
+def _full_replay(plan_dir):
+    state = recover_state.empty_state()
+    recover_state.replay(plan_dir / "event-log.jsonl", state, 0)
+    return state
+
+
+def test_tail_replay_matches_full_replay(plan_dir):
+    log = plan_dir / "event-log.jsonl"
+    write_events(log, _events(50))
+    info = recover_state.take_snapshot(plan_dir, every=1, keep=3)
+    assert info["written"]
+
+    write_events(log, _events(30, start=50), mode="a")
+    state, info = recover_state.recover(plan_dir)
+
+    assert info["snapshot"] is not None
+    assert info["tail_events"] == 30
+    assert state == _full_replay(plan_dir)
+
+
+def test_snapshot_rejected_when_log_rewritten(plan_dir):
+    log = plan_dir / "event-log.jsonl"
+    write_events(log, _events(20))
+    recover_state.take_snapshot(plan_dir, every=1, keep=3)
+
+    # Same length, different bytes before the snapshot offset.
+    log.write_text(log.read_text().replace("REVIEW_FAILED", "AUDIT_FAILED_"))
+    state, info = recover_state.recover(plan_dir)
+
+    assert info["rejected_snapshots"] == 1
+    assert info["snapshot"] is None
+    assert state == _full_replay(plan_dir)
+    assert state["tasks"]["task-1-1"]["audit_failures"] == 0
+
+
+def test_snapshot_rejected_on_checksum_mismatch(plan_dir):
+    write_events(plan_dir / "event-log.jsonl", _events(10))
+    recover_state.take_snapshot(plan_dir, every=1, keep=3)
+    path = recover_state.list_snapshots(plan_dir / "snapshots")[0]
+    snapshot = json.loads(path.read_text())
+    snapshot["state"]["events_applied"] = 999
+    path.write_text(json.dumps(snapshot))
+
+    _, info = recover_state.recover(plan_dir)
+
+    assert info["rejected_snapshots"] == 1
+    assert info["tail_events"] == 10
+
+
+def test_partial_trailing_line_is_not_consumed(plan_dir):
+    log = plan_dir / "event-log.jsonl"
+    write_events(log, _events(3))
+    with open(log, "a") as handle:
+        handle.write('{"event": "AUDIT_PA')
+
+    state, info = recover_state.recover(plan_dir)
+
+    assert state["events_applied"] == 3
+    assert info["offset"] < log.stat().st_size
+
+
+def test_snapshot_waits_for_enough_events(plan_dir):
+    write_events(plan_dir / "event-log.jsonl", _events(5))
+    assert recover_state.take_snapshot(plan_dir, every=10, keep=3)["written"] is None
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from conftest import load_script, write_events
+
+run_verifications = load_script("run-verifications")
+Check = run_verifications.Check
+
+
+def _run(tmp_path, checks, **kwargs):
+    return run_verifications.run_all(checks, tmp_path, cache_dir=None, jobs=4, timeout=30, **kwargs)
+
+
+def test_results_map_to_their_own_check_when_names_repeat(tmp_path):
+    checks = [
+        Check("Unit Tests", "exit 0", environment="local"),
+        Check("Unit Tests", "exit 3", environment="Devcontainer"),
+        Check("Unit Tests", "exit 3", exit_code=3),
+    ]
+    report = _run(tmp_path, checks, local_environments=frozenset({"Devcontainer"}))
+    assert [(c["exit_code"], c["passed"]) for c in report["checks"]] == [(0, True), (3, False), (3, True)]
+    assert report["status"] == "UNHEALTHY"
+
+
+def test_other_environments_are_skipped_not_run(tmp_path):
+    marker = tmp_path / "ran"
+    checks = [
+        Check("Lint", "exit 0"),
+        Check("Unit Tests", f"touch {marker}", environment="Devcontainer"),
+    ]
+    report = _run(tmp_path, checks)
+    assert not marker.exists()
+    lint, tests = report["checks"]
+    assert lint["passed"] and "skipped" not in lint
+    assert tests["skipped"] == "environment Devcontainer not executable locally"
+    assert (report["status"], report["ran"], report["skipped"]) == ("HEALTHY", 1, 1)
+
+
+def test_named_environment_runs_locally(tmp_path):
+    marker = tmp_path / "ran"
+    report = _run(tmp_path, [Check("Unit Tests", f"touch {marker}", environment="Mac")],
+                  local_environments=frozenset({"Mac"}))
+    assert marker.exists()
+    assert report["checks"][0]["passed"]
+
+
+def _cached_run(tmp_path, checks, **kwargs):
+    return run_verifications.run_all(checks, tmp_path, cache_dir=tmp_path / ".cache", jobs=4, timeout=30, **kwargs)
+
+
+def test_unchanged_inputs_hit_the_cache_and_edits_invalidate_it(tmp_path):
+    (tmp_path / "app.py").write_text("x = 1\n")
+    checks = [Check("Lint", "exit 0")]
+    assert _cached_run(tmp_path, checks)["ran"] == 1
+    assert _cached_run(tmp_path, checks)["checks"][0]["cached"]
+
+    (tmp_path / "app.py").write_text("x = 2\n")
+    report = _cached_run(tmp_path, checks)
+    assert (report["ran"], report["checks"][0]["cached"]) == (1, False)
+
+
+def test_failures_are_not_cached(tmp_path):
+    checks = [Check("Lint", "exit 1")]
+    _cached_run(tmp_path, checks)
+    assert _cached_run(tmp_path, checks)["ran"] == 1
+
+
+def test_inputs_narrow_the_cache_key(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("x = 1\n")
+    (tmp_path / "notes.md").write_text("a\n")
+    checks = [Check("Lint", "exit 0", inputs=["src/*"])]
+    _cached_run(tmp_path, checks)
+
+    (tmp_path / "notes.md").write_text("b\n")
+    assert _cached_run(tmp_path, checks)["cached"] == 1
+    (tmp_path / "src" / "app.py").write_text("x = 2\n")
+    assert _cached_run(tmp_path, checks)["ran"] == 1
+
+
+def test_cached_pass_needs_a_later_healthy_audit(tmp_path):
+    checks = [Check("Lint", "exit 0")]
+    _cached_run(tmp_path, checks)
+    assert _cached_run(tmp_path, checks, require_healthy=True)["ran"] == 1
+    finished = _cached_run(tmp_path, checks)["checks"][0]["finished_at"]
+    assert _cached_run(tmp_path, checks, require_healthy=True, trusted_after=finished - 1)["ran"] == 1
+    finished = _cached_run(tmp_path, checks)["checks"][0]["finished_at"]
+    assert _cached_run(tmp_path, checks, require_healthy=True, trusted_after=finished + 1)["cached"] == 1
+
+
+def test_last_healthy_time_reads_the_event_log(tmp_path):
+    log = tmp_path / "event-log.jsonl"
+    write_events(log, [
+        {"event": "HEALTH_AUDIT: HEALTHY", "timestamp": 10},
+        {"event": "HEALTH_AUDIT: UNHEALTHY", "timestamp": 20},
+        {"event": "HEALTH_AUDIT: HEALTHY", "timestamp": 30},
+        {"event": "HEALTH_AUDIT: UNHEALTHY", "timestamp": 40},
+    ])
+    assert run_verifications.last_healthy_time(log) == 30
+
+
+def test_cache_trimming_keeps_recently_hit_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_verifications, "MAX_CACHED_RESULTS", 2)
+    often, once, later = Check("Often", "exit 0"), Check("Once", "true"), Check("Later", ":")
+    _cached_run(tmp_path, [often])
+    _cached_run(tmp_path, [once])
+    _cached_run(tmp_path, [often])
+    _cached_run(tmp_path, [later])
+    assert _cached_run(tmp_path, [often])["cached"] == 1
+    assert _cached_run(tmp_path, [once])["ran"] == 1
+
+
+def test_related_tests_match_changed_files_and_their_tests():
+    files = ["src/app.py", "src/util.py", "tests/test_app.py", "web/app.test.ts", "tests/test_util.py"]
+    assert run_verifications.related_tests(["src/app.py"], files) == ["tests/test_app.py", "web/app.test.ts"]
+    assert run_verifications.related_tests(["tests/test_util.py"], files) == ["tests/test_util.py"]
+    assert run_verifications.related_tests(["README.md"], files) == []
+
+
+def test_narrow_command_substitutes_or_appends_files():
+    tests = ["tests/test_a.py", "tests/my test.py"]
+    assert run_verifications.narrow_command("pytest {files} -q", tests) == "pytest tests/test_a.py 'tests/my test.py' -q"
+    assert run_verifications.narrow_command("npm test --", tests[:1]) == "npm test -- tests/test_a.py"
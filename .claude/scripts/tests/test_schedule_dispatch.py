@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPTS_DIR, load_script, write_events
+
+parse_plan = load_script("parse-plan")
+schedule_dispatch = load_script("schedule-dispatch")
+
+PLAN = "### Task 1: a\n### Task 2: b\nDepends on: Task 1\n### Task 3: c\n"
+
+
+def _graph() -> dict:
+    return parse_plan.build_graph(*parse_plan.parse_plan(PLAN.splitlines(keepends=True)))
+
+
+def _run(path, start: float, fail_task: str | None = None) -> None:
+    events, t = [], start
+    for task_id in ("task-1", "task-2", "task-3"):
+        events.append({"timestamp": t, "event": "TASK_DISPATCHED", "task_id": task_id})
+        if task_id == fail_task:
+            t += 100
+            events.append({"timestamp": t, "event": f"READY_FOR_REVIEW: {task_id}"})
+            t += 50
+            events.append({"timestamp": t, "event": f"REVIEW_FAILED: {task_id}"})
+        t += 100
+        events.append({"timestamp": t, "event": f"READY_FOR_REVIEW: {task_id}"})
+        t += 50
+        events.append({"timestamp": t, "event": f"AUDIT_PASSED: {task_id}"})
+    write_events(path, events)
+
+
+def test_repeated_runs_do_not_concatenate_rounds(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    _run(first, 1_700_000_000)
+    _run(second, 1_800_000_000)
+    graph = _graph()
+
+    single = schedule_dispatch.compare_policies(graph, schedule_dispatch.load_history([first]), 5)
+    both = schedule_dispatch.compare_policies(graph, schedule_dispatch.load_history([first, second]), 5)
+
+    assert both["fifo_makespan"] == single["fifo_makespan"] == 300
+    history = schedule_dispatch.load_history([first, second])
+    assert [len(h.rounds) for h in history.values()] == [1, 1, 1]
+    assert history["task-1"].rounds[0][0] == 100
+
+
+def test_rounds_are_averaged_across_runs(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    _run(first, 0, fail_task="task-1")
+    _run(second, 10_000, fail_task="task-1")
+    history = schedule_dispatch.load_history([first, second])
+    assert len(history["task-1"].rounds) == 2
+    assert history["task-1"].failures == 1
+
+
+def test_rank_prefers_the_longer_chain(tmp_path):
+    ranked = schedule_dispatch.rank_ready(_graph(), {})
+    assert [r["task_id"] for r in ranked] == ["task-1", "task-3"]
+
+
+def test_rank_uses_the_last_log_as_the_current_run(tmp_path):
+    past, current = tmp_path / "past.jsonl", tmp_path / "current.jsonl"
+    _run(past, 0)
+    write_events(current, [{"timestamp": 1, "event": "AUDIT_PASSED: task-1"}])
+    ranked = schedule_dispatch.rank_ready(_graph(), schedule_dispatch.load_history([past, current]))
+    assert sorted(r["task_id"] for r in ranked) == ["task-2", "task-3"]
+
+
+def test_failure_in_some_runs_keeps_a_rework_rate(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    _run(first, 0, fail_task="task-1")
+    _run(second, 10_000)
+    graph = _graph()
+
+    single = schedule_dispatch.estimate(graph, schedule_dispatch.load_history([first])).rework
+    merged = schedule_dispatch.estimate(graph, schedule_dispatch.load_history([first, second])).rework
+
+    assert merged["task-1"] == pytest.approx(0.219, abs=1e-3)
+    assert 0 < merged["task-1"] < single["task-1"]
+    assert merged["task-1"] > merged["task-2"]
+
+
+def test_single_failure_is_anchored_to_the_base_rate(tmp_path):
+    log = tmp_path / "a.jsonl"
+    write_events(log, [
+        {"timestamp": 0, "event": "TASK_DISPATCHED", "task_id": "task-1"},
+        {"timestamp": 100, "event": "READY_FOR_REVIEW: task-1"},
+        {"timestamp": 150, "event": "REVIEW_FAILED: task-1"},
+    ])
+    graph = _graph()
+    history = schedule_dispatch.load_history([log])
+    estimates = schedule_dispatch.estimate(graph, history)
+
+    assert estimates.rework["task-1"] == pytest.approx(1.4 / 3)
+    assert estimates.rework["task-2"] == estimates.rework["task-3"] == pytest.approx(0.36)
+    # The failed round did not finish the task: at least one more is replayed.
+    rounds = schedule_dispatch.task_rounds("task-1", history, estimates)
+    assert len(rounds) == 1 + round(estimates.rounds("task-1"))
+
+
+def test_rank_negative_slots_returns_nothing(tmp_path):
+    graph_path = tmp_path / "g.json"
+    graph_path.write_text(json.dumps(_graph()))
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "schedule-dispatch.py"), "rank", str(graph_path), "--slots", "-1"],
+        capture_output=True, text=True, check=True,
+    )
+    assert json.loads(result.stdout) == []